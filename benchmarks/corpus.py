@@ -0,0 +1,176 @@
+import random
+import string
+from typing import Callable
+
+from wumpus.sanitizer import Member
+
+FONT_OFFSETS = {
+    "bold": (0x1D400, 0x1D41A),
+    "italic": (0x1D434, 0x1D44E),
+    "script": (0x1D4D0, 0x1D4EA),
+    "fraktur": (0x1D56C, 0x1D586),
+    "sans_bold": (0x1D5D4, 0x1D5EE),
+    "monospace": (0x1D670, 0x1D68A),
+    "fullwidth": (0xFF21, 0xFF41),
+}
+
+CIRCLED_UPPER = 0x24B6
+NEGATIVE_CIRCLED_UPPER = 0x1F150
+NEGATIVE_SQUARED_UPPER = 0x1F170
+REGIONAL_INDICATOR_A = 0x1F1E6
+
+ZWJ_EMOJI = [
+    "👨‍👩‍👧‍👦",
+    "👩🏽‍💻",
+    "🏳️‍🌈",
+    "🧑🏿‍🚀",
+    "👁️‍🗨️",
+    "❤️‍🔥",
+    "🐻‍❄️",
+    "👍🏻",
+]
+SIMPLE_EMOJI = ["👀", "😎", "🔥", "✨", "💀", "🎮", "⭐", "🌙", "🍀", "⚡"]
+HOIST_PREFIXES = ["!", "!!", ".", "$", "[", "(", "|", "||", "~", "#", "*", "-", "_", "'", "+"]
+WORDS = ["alex", "gamer", "wolf", "shadow", "nova", "pixel", "king", "luna", "ghost", "toast", "rex", "mia", "zed"]
+
+
+def ascii_name(rng: random.Random) -> str:
+    name = rng.choice(WORDS)
+
+    if rng.random() < 0.5:
+        name = name.capitalize()
+
+    if rng.random() < 0.3:
+        name += str(rng.randint(0, 9999))
+
+    if rng.random() < 0.2:
+        name += f" {rng.choice(WORDS)}"
+
+    return name
+
+
+def fancy_font_name(rng: random.Random) -> str:
+    upper, lower = FONT_OFFSETS[rng.choice(list(FONT_OFFSETS))]
+    chars = []
+
+    for char in ascii_name(rng):
+        if char in string.ascii_uppercase:
+            chars.append(chr(upper + ord(char) - ord("A")))
+        elif char in string.ascii_lowercase:
+            chars.append(chr(lower + ord(char) - ord("a")))
+        else:
+            chars.append(char)
+
+    return "".join(chars)
+
+
+def enclosed_name(rng: random.Random) -> str:
+    base = rng.choice([CIRCLED_UPPER, NEGATIVE_CIRCLED_UPPER, NEGATIVE_SQUARED_UPPER])
+    letters = [char for char in ascii_name(rng).upper() if char.isalpha()]
+    return "".join(chr(base + ord(char) - ord("A")) for char in letters)
+
+
+def zwj_emoji_name(rng: random.Random) -> str:
+    leading = "".join(rng.choices(ZWJ_EMOJI + SIMPLE_EMOJI, k=rng.randint(0, 3)))
+    trailing = "".join(rng.choices(ZWJ_EMOJI + SIMPLE_EMOJI, k=rng.randint(1, 3)))
+    return f"{leading}{ascii_name(rng)}{trailing}"
+
+
+def regional_indicator_name(rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        flag = "".join(chr(REGIONAL_INDICATOR_A + rng.randrange(26)) for _ in range(2))
+        return f"{flag} {ascii_name(rng)}"
+
+    letters = [char for char in ascii_name(rng).upper() if char.isalpha()]
+    return "".join(chr(REGIONAL_INDICATOR_A + ord(char) - ord("A")) for char in letters)
+
+
+def zalgo_name(rng: random.Random) -> str:
+    chars = []
+
+    for char in ascii_name(rng):
+        chars.append(char)
+        chars.extend(chr(rng.randint(0x0300, 0x036F)) for _ in range(rng.randint(0, 6)))
+
+    return "".join(chars)
+
+
+def hoisting_name(rng: random.Random) -> str:
+    name = f"{rng.choice(HOIST_PREFIXES)}{ascii_name(rng)}"
+
+    if rng.random() < 0.3:
+        name = f"({name[0]}){name[1:]}"
+
+    if rng.random() < 0.3:
+        name = f"| {name} |"
+
+    return name
+
+
+def repeat_run_name(rng: random.Random) -> str:
+    name = ascii_name(rng)
+    index = rng.randrange(len(name))
+    run = name[index] * rng.randint(4, 24)
+
+    if rng.random() < 0.3:
+        run = run.upper()
+
+    return f"{name[:index]}{run}{name[index + 1:]}"[:32]
+
+
+GENERATORS: dict[str, Callable[[random.Random], str]] = {
+    "ascii": ascii_name,
+    "fancy_font": fancy_font_name,
+    "enclosed": enclosed_name,
+    "zwj_emoji": zwj_emoji_name,
+    "regional_indicator": regional_indicator_name,
+    "zalgo": zalgo_name,
+    "hoisting": hoisting_name,
+    "repeat_run": repeat_run_name,
+}
+
+# Rough shares of each name type in production traffic; most members have plain ASCII names.
+WEIGHTS = {
+    "ascii": 60,
+    "fancy_font": 8,
+    "enclosed": 3,
+    "zwj_emoji": 8,
+    "regional_indicator": 3,
+    "zalgo": 2,
+    "hoisting": 10,
+    "repeat_run": 6,
+}
+
+
+def generate_names(count: int, seed: int = 0, kinds: list[str] | None = None) -> list[str]:
+    """
+    Generate `count` names, drawing name types by production weights (or uniformly from `kinds`).
+    """
+
+    rng = random.Random(seed)
+    kinds = kinds or list(WEIGHTS)
+    weights = [WEIGHTS[kind] for kind in kinds]
+    return [GENERATORS[kind](rng) for kind in rng.choices(kinds, weights=weights, k=count)]
+
+
+def generate_members(count: int, seed: int = 0) -> list[Member]:
+    """
+    Generate `count` members with snowflake IDs, roles, and a nickname for about half of them.
+    """
+
+    rng = random.Random(seed)
+    usernames = generate_names(count, seed)
+    nicknames = generate_names(count, seed + 1)
+    members = []
+
+    for i in range(count):
+        members.append(
+            Member(
+                id=str(rng.randint(10**17, 10**19)),
+                username=usernames[i],
+                nickname=nicknames[i] if rng.random() < 0.5 else None,
+                roles=[str(rng.randint(10**17, 10**19)) for _ in range(rng.randint(0, 5))],
+            )
+        )
+
+    return members
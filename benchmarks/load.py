@@ -0,0 +1,302 @@
+"""
+Load-test `/v1/sanitize` with a synthetic or recorded traffic mix at a target rate and concurrency, and report
+latency percentiles, throughput and server CPU.
+
+    python -m benchmarks.load                                               # in-process WSGI app
+    python -m benchmarks.load --serve "-k gevent -w 2" --rate 200           # local gunicorn with these arguments
+    python -m benchmarks.load --url http://127.0.0.1:8080 --replay bodies.jsonl
+
+Requests are sent open-loop when `--rate` is set: each request has a scheduled start time, and its latency is
+measured from that time, so a slow server also accumulates the queueing delay its clients would see.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from typing import Any, Callable
+
+from benchmarks.corpus import generate_members
+from benchmarks.run import CONFIGS
+
+BODY_POOL_SIZE = 200
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+# Request = (encoded body, member count); Send = body -> status code.
+Request = tuple[bytes, int]
+Send = Callable[[bytes], int]
+
+
+def parse_batch_sizes(spec: str) -> dict[int, float]:
+    """
+    Parse `size:weight,...`, e.g. `1:50,10:30,100:15,1000:5`.
+    """
+
+    weights = {}
+
+    for item in spec.split(","):
+        size, _, weight = item.partition(":")
+        weights[int(size)] = float(weight or 1)
+
+    return weights
+
+
+def synthetic_requests(batch_sizes: dict[int, float], configs: list[str], seed: int) -> list[Request]:
+    rng = random.Random(seed)
+    requests = []
+
+    for i in range(BODY_POOL_SIZE):
+        (size,) = rng.choices(list(batch_sizes), weights=list(batch_sizes.values()))
+        members = [member.dict() for member in generate_members(size, seed + i)]
+        body = {"members": members, **CONFIGS[rng.choice(configs)]}
+        requests.append((json.dumps(body).encode(), size))
+
+    return requests
+
+
+def recorded_requests(path: str) -> list[Request]:
+    """
+    Read recorded `/v1/sanitize` bodies, one JSON object per line.
+    """
+
+    requests = []
+
+    with open(path, "rb") as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                requests.append((line, len(json.loads(line).get("members", []))))
+
+    return requests
+
+
+def wsgi_sender() -> Callable[[], Send]:
+    from wumpus.main import app
+
+    def make_sender() -> Send:
+        client = app.test_client()
+        return lambda body: client.post("/v1/sanitize", data=body, content_type="application/json").status_code
+
+    return make_sender
+
+
+def http_sender(url: str) -> Callable[[], Send]:
+    parsed = urllib.parse.urlsplit(url)
+    path = (parsed.path.rstrip("/") or "") + "/v1/sanitize"
+
+    def make_sender() -> Send:
+        connection = http.client.HTTPConnection(parsed.hostname or "127.0.0.1", parsed.port or 80, timeout=30)
+
+        def send(body: bytes) -> int:
+            try:
+                connection.request("POST", path, body, {"Content-Type": "application/json"})
+                response = connection.getresponse()
+                response.read()
+                return response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                return 0
+
+        return send
+
+    return make_sender
+
+
+def run_load(
+    make_sender: Callable[[], Send], requests: list[Request], rate: float, concurrency: int, duration: float
+) -> tuple[list[float], dict[int, int], int, float]:
+    """
+    Send requests from `concurrency` threads for `duration` seconds, at `rate` requests per second in total
+    (or as fast as possible with a rate of 0). Get the latencies, the count per status code (0 for connection
+    errors), the members sent, and the elapsed time.
+    """
+
+    lock = threading.Lock()
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    counter = iter(range(sys.maxsize))
+    members = 0
+    start = time.perf_counter()
+    end = start + duration
+
+    def worker() -> None:
+        nonlocal members
+        send = make_sender()
+
+        while True:
+            with lock:
+                index = next(counter)
+
+            scheduled = start + index / rate if rate else time.perf_counter()
+            if scheduled >= end:
+                return
+
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            body, size = requests[index % len(requests)]
+            status = send(body)
+            latency = time.perf_counter() - scheduled
+
+            with lock:
+                latencies.append(latency)
+                statuses[status] = statuses.get(status, 0) + 1
+                members += size if status == 200 else 0
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return latencies, statuses, members, time.perf_counter() - start
+
+
+def process_cpu(pid: int) -> float:
+    """
+    Get the user and system CPU seconds used so far by a process.
+    """
+
+    with open(f"/proc/{pid}/stat") as file:
+        fields = file.read().rsplit(")", 1)[1].split()
+
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def child_pids(pid: int) -> list[int]:
+    children = []
+
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as file:
+                    if int(file.read().rsplit(")", 1)[1].split()[1]) == pid:
+                        children.append(int(entry))
+            except (OSError, ValueError):
+                continue
+
+    return sorted(children)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+def start_server(gunicorn_args: str) -> tuple[subprocess.Popen[bytes], str]:
+    """
+    Start gunicorn with the app's config and the given arguments, and wait until it accepts connections.
+    """
+
+    port = free_port()
+    command = [sys.executable, "-m", "gunicorn", "-c", "python:wumpus.gunicorn_conf", "-b", f"127.0.0.1:{port}"]
+    command += [*shlex.split(gunicorn_args), "wumpus.main:app"]
+    env = {key: value for key, value in os.environ.items() if key != "SENTRY_DSN"}
+    server = subprocess.Popen(command, env=env)
+    deadline = time.monotonic() + 30
+
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {server.returncode}")
+
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+
+    server.terminate()
+    raise RuntimeError("gunicorn did not start")
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test /v1/sanitize and report latency, throughput and CPU.")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="send requests to a running server")
+    target.add_argument("--serve", metavar="ARGS", help='start gunicorn with these arguments, e.g. "-k gevent -w 2"')
+    parser.add_argument("--replay", metavar="PATH", help="recorded request bodies, one JSON object per line")
+    parser.add_argument("--batch-sizes", default="1:50,10:30,100:15,1000:5", help="synthetic size:weight mix")
+    parser.add_argument("--configs", default=",".join(CONFIGS), help="synthetic configs from benchmarks.run.CONFIGS")
+    parser.add_argument("--rate", type=float, default=0, help="requests per second in total (0: as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent connections")
+    parser.add_argument("--duration", type=float, default=10, help="seconds to send requests for")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed")
+    parser.add_argument("--save", metavar="PATH", help="write the report to a JSON file")
+    args = parser.parse_args()
+
+    if args.replay:
+        requests = recorded_requests(args.replay)
+    else:
+        requests = synthetic_requests(parse_batch_sizes(args.batch_sizes), args.configs.split(","), args.seed)
+
+    server = None
+    pids: list[int] = []
+
+    if args.serve:
+        server, url = start_server(args.serve)
+        pids = child_pids(server.pid)
+        make_sender = http_sender(url)
+    elif args.url:
+        make_sender = http_sender(args.url)
+    else:
+        pids = [os.getpid()]
+        make_sender = wsgi_sender()
+
+    try:
+        cpu_before = {pid: process_cpu(pid) for pid in pids}
+        latencies, statuses, members, elapsed = run_load(
+            make_sender, requests, args.rate, args.concurrency, args.duration
+        )
+        cpu = {pid: process_cpu(pid) - cpu_before[pid] for pid in pids}
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report: dict[str, Any] = {
+        "requests": len(latencies),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "requests_per_second": len(latencies) / elapsed,
+        "members_per_second": members / elapsed,
+        "latency_ms": {
+            name: percentile(sorted(latencies), fraction) * 1e3 if latencies else 0
+            for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+        },
+        "worker_cpu_percent": {str(pid): seconds / elapsed * 100 for pid, seconds in cpu.items()},
+    }
+
+    print(f"requests     {report['requests']:,} ({report['requests_per_second']:,.1f}/s)")
+    print(f"members/s    {report['members_per_second']:,.0f}")
+    print(f"statuses     {', '.join(f'{status}: {count:,}' for status, count in report['statuses'].items())}")
+    print("latency      " + ", ".join(f"{name} {ms:.2f}ms" for name, ms in report["latency_ms"].items()))
+
+    for pid, percent in report["worker_cpu_percent"].items():
+        print(f"cpu[{pid}]   {percent:.1f}%")
+
+    if not args.serve and not args.url:
+        print("(in-process: the CPU figure includes the load generator)")
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(report, file, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
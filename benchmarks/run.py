@@ -0,0 +1,293 @@
+"""
+Benchmark `Sanitizer.sanitize` end to end (also with a warm shared result cache), request decoding and encoding,
+`/v1/sanitize` requests with and without compression, and each `Sanitizer` helper on a seeded name corpus.
+
+    python -m benchmarks.run                              # print timings
+    python -m benchmarks.run --save baseline.json         # store a baseline
+    python -m benchmarks.run --compare baseline.json      # fail if anything is >10% slower than the baseline
+    python -m benchmarks.run --filter helper[             # only run the benchmarks whose name contains "helper["
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable
+
+from unidecode import unidecode
+
+from benchmarks.corpus import generate_members, generate_names
+from wumpus.cache import RESULT_CACHE, SQLiteCache
+from wumpus.codec import decode_sanitize_request, dumps, loads
+from wumpus.compression import SUPPORTED_ENCODINGS, encode_body
+from wumpus.sanitizer import Sanitizer, SanitizerPlan, SanitizeSchema, transliteration_table
+
+BATCH_SIZES = [1, 10, 100, 1000]
+HELPER_CORPUS_SIZE = 1000
+
+CONFIGS: dict[str, dict[str, Any]] = {
+    "default": {},
+    "all_stages": {
+        "max_char_spacing": 4,
+        "max_consecutive": 4,
+        "max_consecutive_upper": 4,
+        "max_emoji_leading": 2,
+        "max_emoji_trailing": 2,
+        "max_spaces": 4,
+        "strict": True,
+        "trailing_trademark": True,
+    },
+}
+
+
+def measure(func: Callable[[], Any], repeat: int, min_time: float) -> float:
+    """
+    Get the median seconds per call of `func` over `repeat` runs of at least `min_time` seconds each.
+    """
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+
+        if elapsed >= min_time:
+            break
+
+        number *= 2
+
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+
+    return statistics.median(timings)
+
+
+def bench_sanitize(repeat: int, min_time: float, seed: int, pattern: str) -> dict[str, float]:
+    """
+    Time `Sanitizer.sanitize` per batch size and config, with a cold result cache on every call.
+    """
+
+    results = {}
+
+    for config_name, config in CONFIGS.items():
+        for batch_size in BATCH_SIZES:
+            benchmark = f"sanitize[{config_name},{batch_size}]"
+            if pattern not in benchmark:
+                continue
+
+            schema = SanitizeSchema(members=generate_members(batch_size, seed), **config)
+            SanitizerPlan.compile(schema)
+
+            def run() -> None:
+                RESULT_CACHE.clear()
+                Sanitizer.sanitize(schema)
+
+            results[benchmark] = measure(run, repeat, min_time)
+
+    return results
+
+
+def bench_shared_cache(repeat: int, min_time: float, seed: int, pattern: str) -> dict[str, float]:
+    """
+    Time `Sanitizer.sanitize` for a worker with a cold in-process cache and a warm SQLite shared cache, as when a
+    repeated bulk sync lands on a different worker.
+    """
+
+    results = {}
+    shared = RESULT_CACHE.shared
+
+    with tempfile.TemporaryDirectory() as directory:
+        RESULT_CACHE.shared = SQLiteCache(os.path.join(directory, "results.db"), 1_000_000, 3600)
+
+        try:
+            for batch_size in BATCH_SIZES:
+                benchmark = f"sanitize[shared,{batch_size}]"
+                if pattern not in benchmark:
+                    continue
+
+                schema = SanitizeSchema(members=generate_members(batch_size, seed))
+                Sanitizer.sanitize(schema)
+
+                def run() -> None:
+                    RESULT_CACHE.clear()
+                    Sanitizer.sanitize(schema)
+
+                results[benchmark] = measure(run, repeat, min_time)
+        finally:
+            RESULT_CACHE.shared = shared
+            RESULT_CACHE.clear()
+
+    return results
+
+
+def bench_codec(repeat: int, min_time: float, seed: int, pattern: str) -> dict[str, float]:
+    """
+    Time decoding, validating and encoding a `/v1/sanitize` request with pydantic and stdlib JSON (the original path),
+    and with `wumpus.codec`.
+    """
+
+    results = {}
+
+    for batch_size in BATCH_SIZES:
+        members = generate_members(batch_size, seed)
+        body = json.dumps({"members": [member.dict() for member in members]}).encode()
+        response = {member.id: member.username for member in members}
+
+        def run_pydantic() -> None:
+            SanitizeSchema(**json.loads(body))
+            json.dumps(response)
+
+        def run_codec() -> None:
+            decode_sanitize_request(loads(body))
+            dumps(response)
+
+        for benchmark, run in (
+            (f"codec[pydantic,{batch_size}]", run_pydantic),
+            (f"codec[fast,{batch_size}]", run_codec),
+        ):
+            if pattern in benchmark:
+                results[benchmark] = measure(run, repeat, min_time)
+
+    return results
+
+
+def bench_compression(repeat: int, min_time: float, seed: int, pattern: str) -> dict[str, float]:
+    """
+    Time `/v1/sanitize` requests end to end through the WSGI app, with the request and response bodies sent
+    uncompressed and in each supported content coding.
+    """
+
+    from wumpus.main import app
+
+    client = app.test_client()
+    results = {}
+
+    for batch_size in BATCH_SIZES:
+        body = json.dumps({"members": [member.dict() for member in generate_members(batch_size, seed)]}).encode()
+
+        for encoding in ("identity", *SUPPORTED_ENCODINGS):
+            benchmark = f"http[{encoding},{batch_size}]"
+            if pattern not in benchmark:
+                continue
+
+            data, _ = encode_body(body, encoding, threshold=0)
+            headers = {"Accept-Encoding": encoding, "Content-Encoding": encoding}
+
+            def run() -> None:
+                client.post("/v1/sanitize", data=data, content_type="application/json", headers=headers)
+
+            results[benchmark] = measure(run, repeat, min_time)
+
+    return results
+
+
+def bench_helpers(repeat: int, min_time: float, seed: int, pattern: str) -> dict[str, float]:
+    """
+    Time each `Sanitizer` helper over the whole corpus. Text helpers get transliterated names, as in the pipeline.
+    """
+
+    names = generate_names(HELPER_CORPUS_SIZE, seed)
+    table = transliteration_table(True)
+    ascii_names = [" ".join(unidecode(name).split()) for name in names]
+
+    helpers: dict[str, tuple[Callable[[str], str], list[str]]] = {
+        "unidecode": (lambda name: unidecode(name, errors="replace", replace_str=""), names),
+        "transliterate": (lambda name: table.transliterate(name, ""), names),
+        "get_leading_emoji": (lambda name: Sanitizer.get_leading_emoji(name, 2), names),
+        "get_trailing_emoji": (lambda name: Sanitizer.get_trailing_emoji(name, 2), names),
+        "normalize_brackets": (Sanitizer.normalize_brackets, ascii_names),
+        "dehoist": (Sanitizer.dehoist, ascii_names),
+        "replace_spaces": (lambda name: Sanitizer.replace_spaces(name, 4), ascii_names),
+        "replace_char_spacing": (lambda name: Sanitizer.replace_char_spacing(name, 4), ascii_names),
+        "replace_consecutive": (lambda name: Sanitizer.replace_consecutive(name, 4), ascii_names),
+        "replace_consecutive_upper": (lambda name: Sanitizer.replace_consecutive_upper(name, 4), ascii_names),
+        "strip_dangling_brackets": (Sanitizer.strip_dangling_brackets, ascii_names),
+    }
+
+    results = {}
+
+    for helper_name, (helper, corpus) in helpers.items():
+        benchmark = f"helper[{helper_name}]"
+        if pattern not in benchmark:
+            continue
+
+        def run() -> None:
+            for name in corpus:
+                helper(name)
+
+        results[benchmark] = measure(run, repeat, min_time) / len(corpus)
+
+    return results
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    """
+    Get the benchmarks that are more than `threshold` (a fraction) slower than the baseline.
+    """
+
+    regressions = []
+
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base and seconds > base * (1 + threshold):
+            regressions.append(f"{name}: {base * 1e6:.2f}us -> {seconds * 1e6:.2f}us (+{seconds / base - 1:.0%})")
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the sanitizer on a seeded name corpus.")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark (median is reported)")
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per timed run")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this string")
+    parser.add_argument("--save", metavar="PATH", help="write results to a baseline file")
+    parser.add_argument("--compare", metavar="PATH", help="compare results against a baseline file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown before failing (fraction)")
+    args = parser.parse_args()
+
+    results = {
+        **bench_sanitize(args.repeat, args.min_time, args.seed, args.filter),
+        **bench_shared_cache(args.repeat, args.min_time, args.seed, args.filter),
+        **bench_codec(args.repeat, args.min_time, args.seed, args.filter),
+        **bench_compression(args.repeat, args.min_time, args.seed, args.filter),
+        **bench_helpers(args.repeat, args.min_time, args.seed, args.filter),
+    }
+
+    for name, seconds in results.items():
+        line = f"{name:<45} {seconds * 1e6:>12.2f}us"
+
+        if name.startswith(("sanitize[", "codec[", "http[")):
+            batch_size = int(name.rstrip("]").rsplit(",", 1)[1])
+            line += f" {batch_size / seconds:>12,.0f} members/s"
+
+        print(line)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:", file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Benchmark cold starts: import time, `warm_up` time, and the latency of the first and second requests in a fresh
+process, with and without warming up first (as the gunicorn master does before forking).
+
+    python -m benchmarks.startup                          # print timings
+    python -m benchmarks.startup --compare baseline.json  # fail if anything is >10% slower than the baseline
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any
+
+from benchmarks.corpus import generate_members
+from benchmarks.run import compare
+
+REQUEST_SIZE = 100
+
+CHILD = """
+import json, sys, time
+
+start = time.perf_counter()
+import wumpus.main
+imported = time.perf_counter()
+
+if sys.argv[1] == "warm":
+    from wumpus.warmup import warm_up
+    warm_up(wumpus.main.app)
+warmed = time.perf_counter()
+
+client = wumpus.main.app.test_client()
+timings = {"import": imported - start, "warm_up": warmed - imported}
+
+for request, body in zip(("first_request", "second_request"), json.load(sys.stdin)):
+    start = time.perf_counter()
+    assert client.post("/v1/sanitize", json=body).status_code == 200
+    timings[request] = time.perf_counter() - start
+
+print(json.dumps(timings))
+"""
+
+
+def run_process(mode: str, bodies: list[dict[str, Any]]) -> dict[str, float]:
+    env = {key: value for key, value in os.environ.items() if key != "SENTRY_DSN"}
+    command = [sys.executable, "-c", CHILD, mode]
+    output = subprocess.run(
+        command, input=json.dumps(bodies), capture_output=True, check=True, env=env, text=True
+    ).stdout
+    timings: dict[str, float] = json.loads(output)
+    return timings
+
+
+def bench_startup(repeat: int, seed: int) -> dict[str, float]:
+    """
+    Get the median of each timing over `repeat` fresh processes per mode. The two requests use different names.
+    """
+
+    bodies = [
+        {"members": [member.dict() for member in generate_members(REQUEST_SIZE, seed + i)], "max_consecutive": 4}
+        for i in range(2)
+    ]
+    results = {}
+
+    for mode in ("cold", "warm"):
+        samples = [run_process(mode, bodies) for _ in range(repeat)]
+
+        for name in samples[0]:
+            if name != "warm_up" or mode == "warm":
+                results[f"startup[{mode},{name}]"] = statistics.median(sample[name] for sample in samples)
+
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark cold start and first request latency.")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh processes per mode (median is reported)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed")
+    parser.add_argument("--save", metavar="PATH", help="write results to a baseline file")
+    parser.add_argument("--compare", metavar="PATH", help="compare results against a baseline file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown before failing (fraction)")
+    args = parser.parse_args()
+
+    results = bench_startup(args.repeat, args.seed)
+
+    for name, seconds in results.items():
+        print(f"{name:<45} {seconds * 1e3:>12.2f}ms")
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:", file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+
+from wumpus.admission import AdmissionController, Overloaded, estimate_cost
+from wumpus.sanitizer import Member
+
+
+def test_estimate_cost() -> None:
+    members = [Member(id="1", username="a" * 32, nickname=None), Member(id="2", username="a", nickname="b" * 64)]
+    assert estimate_cost(members) == 5
+
+
+def test_admission_controller_priority() -> None:
+    admission = AdmissionController(budget=10, max_queued=10, queue_timeout=5, retry_after=1)
+    order = []
+
+    def run(name: str, cost: float) -> None:
+        with admission.admit(cost):
+            order.append(name)
+
+    with admission.admit(10):
+        threads = [threading.Thread(target=run, args=args) for args in [("bulk", 9.8), ("small", 1), ("medium", 9.5)]]
+        for thread in threads:
+            thread.start()
+            while len(admission.queue) < threads.index(thread) + 1:
+                time.sleep(0.001)
+
+    for thread in threads:
+        thread.join()
+
+    assert order == ["small", "medium", "bulk"]
+    assert admission.in_flight == 0
+    assert admission.queue == []
+
+
+def test_admission_controller_rejects() -> None:
+    admission = AdmissionController(budget=10, max_queued=1, queue_timeout=0.01, retry_after=3)
+
+    with admission.admit(100):
+        with pytest.raises(Overloaded) as error:
+            with admission.admit(1):
+                pass
+
+        assert error.value.retry_after == 3
+        assert admission.queue == []
+
+        admission.queue.append((1, 0, threading.Event()))
+        with pytest.raises(Overloaded):
+            with admission.admit(1):
+                pass
+
+        admission.queue.clear()
+
+    assert admission.in_flight == 0
+
+    with AdmissionController(budget=0, max_queued=0, queue_timeout=0, retry_after=1).admit(1000):
+        pass
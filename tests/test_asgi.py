@@ -0,0 +1,117 @@
+import asyncio
+import gzip
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from wumpus.asgi import WumpusASGI
+from wumpus.registry import CONFIG_REGISTRY
+
+
+def request(
+    app: WumpusASGI,
+    body: bytes,
+    path: str = "/v1/sanitize",
+    content_type: bytes = b"application/json",
+    headers: list[tuple[bytes, bytes]] | None = None,
+    method: str = "POST",
+) -> tuple[int, dict[bytes, bytes], Any]:
+    headers = [(b"content-type", content_type), *(headers or [])]
+    scope = {"type": "http", "method": method, "path": path, "headers": headers}
+    messages: list[dict[str, Any]] = []
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: dict[str, Any]) -> None:
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    response_headers = dict(messages[0]["headers"])
+    response_body = messages[1]["body"]
+
+    if response_headers.get(b"content-encoding") == b"gzip":
+        response_body = gzip.decompress(response_body)
+
+    return messages[0]["status"], response_headers, json.loads(response_body) if response_body else None
+
+
+def test_asgi_sanitize() -> None:
+    app = WumpusASGI(max_body_size=1024, max_concurrency=1, max_pending=1)
+
+    body = json.dumps({"members": [{"id": "1", "username": "!test", "nickname": None}]}).encode()
+    assert request(app, body)[::2] == (200, {"1": "test"})
+
+    status, _, response = request(app, json.dumps({"members": []}).encode())
+    assert status == 400
+    assert response["message"] == "Bad Request"
+    assert response["errors"]
+
+    assert request(app, b"{")[::2] == (400, {"message": "Bad Request"})
+    assert request(app, body, content_type=b"text/plain")[0] == 400
+    assert request(app, body, path="/v1/other")[::2] == (404, {"message": "Not Found"})
+    assert request(app, b" " * 2048)[::2] == (413, {"message": "Request Entity Too Large"})
+
+
+def test_asgi_sanitize_member() -> None:
+    app = WumpusASGI(max_body_size=1024, max_concurrency=1, max_pending=1)
+
+    body = json.dumps({"member": {"id": "1", "username": "!test", "nickname": None}}).encode()
+    assert request(app, body, path="/v1/sanitize/member")[::2] == (200, {"1": "test"})
+    assert request(app, b"{}", path="/v1/sanitize/member")[0] == 400
+    assert request(app, body, path="/v1/sanitize/member", method="GET")[0] == 405
+
+
+def test_asgi_configs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    app = WumpusASGI(max_body_size=1024, max_concurrency=1, max_pending=1)
+    assert request(app, b"{}", path="/v1/configs")[0] == 404
+
+    monkeypatch.setattr(CONFIG_REGISTRY, "path", str(tmp_path / "configs.db"))
+
+    status, _, response = request(app, json.dumps({"max_consecutive": 2}).encode(), path="/v1/configs")
+    assert (status, response["version"], response["max_consecutive"]) == (201, 1, 2)
+    config_id = response["id"]
+    path = f"/v1/configs/{config_id}"
+
+    status, _, response = request(app, b"", path=path, method="GET")
+    assert (status, response["version"], response["max_consecutive"]) == (200, 1, 2)
+
+    status, _, response = request(app, json.dumps({"max_consecutive": 1}).encode(), path=path, method="PUT")
+    assert (status, response["version"], response["max_consecutive"]) == (200, 2, 1)
+
+    body = json.dumps({"config_id": config_id, "members": [{"id": "1", "username": "teest", "nickname": None}]})
+    assert request(app, body.encode())[::2] == (200, {"1": "test"})
+
+    assert request(app, json.dumps({"max_consecutive": "x"}).encode(), path=path, method="PUT")[0] == 400
+    assert request(app, b"", path=path, method="POST")[0] == 405
+    assert request(app, b"", path=path, method="DELETE")[::2] == (204, None)
+    assert request(app, b"", path=path, method="GET")[::2] == (404, {"message": "Not Found"})
+    assert request(app, body.encode())[0] == 404
+
+
+def test_asgi_backpressure() -> None:
+    app = WumpusASGI(max_body_size=1024, max_concurrency=1, max_pending=1)
+    app.pending = 1
+
+    body = json.dumps({"members": [{"id": "1", "username": "test", "nickname": None}]}).encode()
+    status, headers, response = request(app, body)
+    assert (status, response) == (503, {"message": "Service Unavailable"})
+    assert headers[b"retry-after"] == b"1"
+
+
+def test_asgi_compression() -> None:
+    app = WumpusASGI(max_body_size=4096, max_concurrency=1, max_pending=1)
+
+    members = [{"id": str(i), "username": "!test", "nickname": None} for i in range(100)]
+    body = gzip.compress(json.dumps({"members": members}).encode())
+    headers = [(b"content-encoding", b"gzip"), (b"accept-encoding", b"gzip")]
+
+    status, response_headers, response = request(app, body, headers=headers)
+    assert (status, response) == (200, {str(i): "test" for i in range(100)})
+    assert response_headers[b"content-encoding"] == b"gzip"
+    assert response_headers[b"vary"] == b"Accept-Encoding"
+
+    assert request(app, body, headers=[(b"content-encoding", b"br")])[0] == 415
+    assert request(app, b"{}", headers=[(b"content-encoding", b"gzip")])[0] == 400
@@ -0,0 +1,161 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from wumpus import cache as cache_module
+from wumpus.cache import RESULT_CACHE, RedisCache, ResultCache, SQLiteCache, content_key
+from wumpus.sanitizer import Member, SanitizeConfig, SanitizerPlan
+
+
+def test_result_cache() -> None:
+    cache = ResultCache(maxsize=2, ttl=60)
+
+    assert cache.get(("a", "x")) is None
+    cache.set(("a", "x"), "A")
+    cache.set(("b", "x"), "B")
+    assert cache.get(("a", "x")) == "A"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.set(("c", "x"), "C")
+    assert len(cache) == 2
+    assert cache.get(("b", "x")) is None
+    assert cache.get(("a", "x")) == "A"
+    assert cache.get(("c", "x")) == "C"
+
+
+def test_result_cache_threads(monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = ResultCache(maxsize=1, ttl=60)
+    cache.set(("a", "x"), "A")
+    writers: list[threading.Thread] = []
+
+    def monotonic() -> float:
+        # Let another thread evict the entry being read, as if the reader was preempted mid-lookup.
+        if not writers:
+            writers.append(threading.Thread(target=cache.set, args=(("b", "x"), "B")))
+            writers[0].start()
+            writers[0].join(0.1)
+
+        return time.perf_counter()
+
+    monkeypatch.setattr(time, "monotonic", monotonic)
+    assert cache.get(("a", "x")) == "A"
+    writers[0].join()
+    assert cache.get(("b", "x")) == "B"
+
+
+def test_result_cache_ttl() -> None:
+    cache = ResultCache(maxsize=2, ttl=0.01)
+    cache.set(("a", "x"), "A")
+    time.sleep(0.02)
+    assert cache.get(("a", "x")) is None
+    assert len(cache) == 0
+
+
+def test_result_cache_disabled() -> None:
+    cache = ResultCache(maxsize=0, ttl=60)
+    cache.set(("a", "x"), "A")
+    assert cache.get(("a", "x")) is None
+
+
+def test_sanitize_member_cached() -> None:
+    RESULT_CACHE.clear()
+    plan = SanitizerPlan.compile(SanitizeConfig(exclude_roles=["1"], max_consecutive=1))
+
+    assert plan.sanitize_member(Member(id="123", username="test", nickname="aaa")) == "a"
+    assert plan.sanitize_member(Member(id="456", username="test", nickname="aaa")) == "a"
+    assert (RESULT_CACHE.hits, RESULT_CACHE.misses) == (1, 1)
+
+    assert plan.sanitize_member(Member(id="456", username="test", nickname="aaa", roles=["1"])) == "aaa"
+    assert plan.sanitize_member(Member(id="456", username="bbb", nickname="aaa", force_username=True)) == "b"
+    assert (RESULT_CACHE.hits, RESULT_CACHE.misses) == (1, 2)
+
+
+def test_sqlite_cache(tmp_path: Path) -> None:
+    path = str(tmp_path / "results.db")
+    worker_a = ResultCache(maxsize=16, ttl=60, shared=SQLiteCache(path, maxsize=16, ttl=60))
+    worker_b = ResultCache(maxsize=16, ttl=60, shared=SQLiteCache(path, maxsize=16, ttl=60))
+
+    worker_a.set(("a", "x"), "A")
+    assert worker_b.get(("a", "x")) is None
+    worker_a.flush()
+    assert worker_b.get(("a", "x")) == "A"
+    assert (worker_b.hits, worker_b.shared_hits) == (1, 1)
+
+    # A restarted worker starts with the entries already in the database.
+    restarted = ResultCache(maxsize=16, ttl=60, shared=SQLiteCache(path, maxsize=16, ttl=60))
+    restarted.prefetch([("a", "x"), ("b", "x")])
+    assert restarted.entries[("a", "x")][1] == "A"
+    assert restarted.get(("b", "x")) is None
+    assert restarted.shared_hits == 1
+
+
+def test_shared_cache_version(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = str(tmp_path / "results.db")
+    cache = ResultCache(maxsize=16, ttl=60, shared=SQLiteCache(path, maxsize=16, ttl=60))
+    cache.set(("a", "x"), "A")
+    cache.flush()
+
+    # A release that changes sanitized output bumps the version and doesn't see the older results.
+    monkeypatch.setattr(cache_module, "SHARED_CACHE_VERSION", cache_module.SHARED_CACHE_VERSION + 1)
+    upgraded = ResultCache(maxsize=16, ttl=60, shared=SQLiteCache(path, maxsize=16, ttl=60))
+    assert upgraded.get(("a", "x")) is None
+
+
+def test_sqlite_cache_eviction(tmp_path: Path) -> None:
+    shared = SQLiteCache(str(tmp_path / "results.db"), maxsize=10, ttl=60)
+    shared.set_many([(content_key((str(i), "x")), str(i)) for i in range(25)])
+
+    keys = [content_key((str(i), "x")) for i in range(25)]
+    assert sorted(shared.get_many(keys).values(), key=int) == [str(i) for i in range(15, 25)]
+
+    expired = SQLiteCache(str(tmp_path / "expired.db"), maxsize=10, ttl=0)
+    expired.set_many([(keys[0], "0")])
+    assert expired.get_many(keys[:1]) == {}
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[bytes, bytes] = {}
+        self.commands: list[tuple[bytes, bytes, int]] = []
+
+    def mget(self, keys: list[bytes]) -> list[bytes | None]:
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction: bool) -> "FakeRedis":
+        return self
+
+    def set(self, key: bytes, value: bytes, ex: int) -> None:
+        self.commands.append((key, value, ex))
+
+    def execute(self) -> None:
+        self.data.update((key, value) for key, value, _ in self.commands)
+        self.commands.clear()
+
+
+def test_redis_cache() -> None:
+    client = FakeRedis()
+    cache = ResultCache(maxsize=16, ttl=60, shared=RedisCache(client, ttl=60))
+
+    cache.set(("a", "x"), "Ä")
+    cache.flush()
+    assert client.data == {b"wumpus:" + content_key(("a", "x")): "Ä".encode()}
+
+    cache.clear()
+    assert cache.get(("a", "x")) == "Ä"
+
+
+def test_sanitize_shared_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    RESULT_CACHE.clear()
+    monkeypatch.setattr(RESULT_CACHE, "shared", SQLiteCache(str(tmp_path / "results.db"), maxsize=16, ttl=60))
+
+    members = [Member(id=str(i), username=f"aaa{i % 2}", nickname=None) for i in range(4)]
+    plan = SanitizerPlan.compile(SanitizeConfig(max_consecutive=1))
+    assert plan.sanitize(members) == {"0": "a0", "1": "a1", "2": "a0", "3": "a1"}
+
+    # Another worker with an empty local cache gets every result from the shared cache.
+    RESULT_CACHE.clear()
+    assert plan.sanitize(members) == {"0": "a0", "1": "a1", "2": "a0", "3": "a1"}
+    assert (RESULT_CACHE.shared_hits, RESULT_CACHE.misses) == (2, 0)
+    RESULT_CACHE.clear()
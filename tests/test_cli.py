@@ -0,0 +1,39 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from wumpus.cli import main
+from wumpus.sanitizer import Member, Sanitizer, SanitizeSchema
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cli_jsonl(tmp_path: Path, workers: int) -> None:
+    members = [Member(id=str(i), username=f"!teeest{i % 7}", nickname="ok" if i % 3 else None) for i in range(50)]
+    (tmp_path / "members.jsonl").write_text("\n".join(member.json() for member in members) + "\n\n")
+    (tmp_path / "config.json").write_text(json.dumps({"max_consecutive": 2}))
+
+    args = [str(tmp_path / "members.jsonl"), "--config", str(tmp_path / "config.json"), "--chunk-size", "7"]
+    assert main([*args, "--output", str(tmp_path / "out.jsonl"), "--workers", str(workers), "--quiet"]) == 0
+
+    lines = (tmp_path / "out.jsonl").read_text().splitlines()
+    results = {id: name for line in lines for id, name in json.loads(line).items()}
+    assert results == Sanitizer.sanitize(SanitizeSchema(members=members, max_consecutive=2))
+
+    assert main([*args, "--output", str(tmp_path / "changed.jsonl"), "--changed-only", "--quiet"]) == 0
+    lines = (tmp_path / "changed.jsonl").read_text().splitlines()
+    changed = {id: name for line in lines for id, name in json.loads(line).items()}
+    assert changed == Sanitizer.sanitize_changed(SanitizeSchema(members=members, max_consecutive=2))
+
+
+def test_cli_csv(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    rows = ["id,username,nickname,roles", "1,!test,,", '2,"a,b",,10 11', "3,x,,", ",missing,,"]
+    (tmp_path / "members.csv").write_text("\n".join(rows) + "\n")
+    (tmp_path / "config.json").write_text(json.dumps({"exclude_roles": ["11"], "changed_only": True}))
+
+    assert main([str(tmp_path / "members.csv"), "--config", str(tmp_path / "config.json"), "--workers", "1"]) == 1
+
+    captured = capsys.readouterr()
+    assert captured.out == "id,name\n1,test\n"
+    assert "line 5:" in captured.err
+    assert "3 members, 1 changed, 1 invalid" in captured.err
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+from wumpus.coalesce import Coalescer
+from wumpus.sanitizer import Member, MemberLike, SanitizeConfig, SanitizerPlan
+
+
+class CountingCoalescer(Coalescer):
+    def __init__(self, max_size: int, window: float) -> None:
+        super().__init__(max_size, window)
+        self.batches_run: list[int] = []
+
+    def run(self, plan: SanitizerPlan, members: list[MemberLike]) -> list[str]:
+        self.batches_run.append(len(members))
+        return super().run(plan, members)
+
+
+def sanitize_concurrently(coalescer: Coalescer, plan: SanitizerPlan, members: list[Member]) -> dict[str, str]:
+    results = {}
+
+    def sanitize(member: Member) -> None:
+        results[member.id] = coalescer.sanitize(plan, member)
+
+    threads = [threading.Thread(target=sanitize, args=(member,)) for member in members]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results
+
+
+def test_coalescer() -> None:
+    plan = SanitizerPlan.compile(SanitizeConfig(max_consecutive=1))
+    members = [Member(id=str(i), username=f"!{'a' * (i + 1)}", nickname=None) for i in range(6)]
+
+    # A full batch is sanitized without waiting for the window to end.
+    coalescer = CountingCoalescer(max_size=3, window=60)
+    assert sanitize_concurrently(coalescer, plan, members) == {str(i): "a" for i in range(6)}
+    assert coalescer.batches_run == [3, 3]
+    assert coalescer.batches == {}
+
+    coalescer = CountingCoalescer(max_size=100, window=0.01)
+    assert coalescer.sanitize(plan, members[0]) == "a"
+    assert coalescer.batches_run == [1]
+
+    coalescer = CountingCoalescer(max_size=100, window=0)
+    assert coalescer.sanitize(plan, members[0]) == "a"
+    assert coalescer.batches_run == [1]
+
+
+def test_coalescer_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    plan = SanitizerPlan.compile(SanitizeConfig(max_consecutive=2))
+    member = Member(id="1", username="test", nickname=None)
+
+    def fail(members: list[MemberLike]) -> list[str]:
+        raise RuntimeError("failed")
+
+    monkeypatch.setattr(plan, "sanitize_batch", fail)
+    coalescer = Coalescer(max_size=1, window=60)
+
+    with pytest.raises(RuntimeError):
+        coalescer.sanitize(plan, member)
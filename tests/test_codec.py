@@ -0,0 +1,57 @@
+from typing import Any, Mapping, Sequence
+
+import pytest
+from pydantic import ValidationError
+
+from wumpus.codec import MemberRecord, decode_sanitize_request, dumps, loads
+from wumpus.sanitizer import Member, SanitizeSchema
+
+
+def errors(payload: Any) -> Sequence[Mapping[str, Any]]:
+    with pytest.raises(ValidationError) as error:
+        decode_sanitize_request(payload)
+
+    return error.value.errors()
+
+
+def test_decode_sanitize_request() -> None:
+    payload = {"members": [{"id": "1", "username": "test", "nickname": None, "roles": ["2"]}], "strict": True}
+    options, members = decode_sanitize_request(payload)
+
+    assert options.strict and not options.changed_only
+    assert isinstance(members[0], MemberRecord)
+    assert (members[0].id, members[0].nickname, members[0].roles) == ("1", None, ["2"])
+    assert members[0].force_username is False
+
+    # Values that pydantic coerces take the SanitizeSchema path.
+    options, members = decode_sanitize_request({"members": [{"id": 1, "username": "test"}], "max_spaces": "2"})
+    assert options.max_spaces == 2
+    assert isinstance(members[0], Member) and members[0].id == "1"
+
+
+def test_decode_sanitize_request_errors() -> None:
+    member = {"id": "1", "username": "test"}
+    payloads: list[Any] = [
+        None,
+        {},
+        {"members": []},
+        {"members": [member] * 1001},
+        {"members": [{**member, "roles": ["1"] * 251}]},
+        {"members": [{"id": "1"}]},
+        {"members": [member], "max_spaces": 100},
+    ]
+
+    for payload in payloads:
+        with pytest.raises(ValidationError) as expected:
+            SanitizeSchema(**payload or {})
+
+        assert errors(payload) == expected.value.errors()
+
+
+def test_json() -> None:
+    body = {"2": "ｔｅｓｔ", "1": "test"}
+    assert dumps(body) == '{"2":"ｔｅｓｔ","1":"test"}'.encode()
+    assert loads(dumps(body)) == body
+
+    with pytest.raises(ValueError):
+        loads(b"{")
@@ -0,0 +1,84 @@
+import gzip
+import io
+
+import pytest
+
+from wumpus.compression import (
+    SUPPORTED_ENCODINGS,
+    DecompressedTooLarge,
+    InvalidEncoding,
+    UnsupportedEncoding,
+    decode_body,
+    encode_body,
+    negotiate,
+    open_decoder,
+)
+
+
+def test_decode_body() -> None:
+    body = b'{"members": []}' * 100
+
+    assert decode_body(body, "") == body
+    assert decode_body(body, "identity") == body
+    assert decode_body(gzip.compress(body), "gzip") == body
+    assert decode_body(gzip.compress(body), " GZIP ") == body
+
+    with pytest.raises(UnsupportedEncoding):
+        decode_body(body, "br")
+
+    with pytest.raises(InvalidEncoding):
+        decode_body(b"not gzip", "gzip")
+
+    with pytest.raises(InvalidEncoding):
+        decode_body(gzip.compress(body)[:-10], "gzip")
+
+
+def test_decode_body_limit() -> None:
+    bomb = gzip.compress(b"\0" * 10_000_000)
+    assert len(bomb) < 20_000
+
+    with pytest.raises(DecompressedTooLarge):
+        decode_body(bomb, "gzip", limit=1024 * 1024)
+
+    assert len(decode_body(bomb, "gzip", limit=10_000_000)) == 10_000_000
+
+
+@pytest.mark.parametrize("coding", SUPPORTED_ENCODINGS)
+def test_open_decoder(coding: str) -> None:
+    encoded, encoding = encode_body(b"a\nb\n", coding, threshold=0)
+    assert encoding == coding
+
+    stream = open_decoder(io.BytesIO(encoded), coding)
+    assert stream.readline() == b"a\n"
+    assert stream.readline() == b"b\n"
+    assert stream.readline() == b""
+
+
+def test_negotiate() -> None:
+    assert negotiate("") is None
+    assert negotiate("identity") is None
+    assert negotiate("gzip") == "gzip"
+    assert negotiate("deflate, gzip;q=0.5") == "gzip"
+    assert negotiate("gzip;q=0") is None
+    assert negotiate("*") == "zstd"
+    assert negotiate("*, zstd;q=0") == "gzip"
+    assert negotiate("gzip, zstd;q=0.1") == "gzip"
+    assert negotiate("gzip, zstd") == "zstd"
+    assert negotiate("gzip;q=0.5, *;q=0.8") == "zstd"
+
+
+def test_encode_body() -> None:
+    body = b'{"1": "test"}' * 100
+
+    assert encode_body(body, "") == (body, None)
+    assert encode_body(body, "br") == (body, None)
+    assert encode_body(body, "gzip", threshold=len(body) + 1) == (body, None)
+
+    encoded, encoding = encode_body(body, "gzip", threshold=0)
+    assert encoding == "gzip"
+    assert len(encoded) < len(body)
+    assert decode_body(encoded, encoding) == body
+
+    encoded, encoding = encode_body(body, "zstd, gzip", threshold=0)
+    assert encoding == "zstd"
+    assert decode_body(encoded, encoding) == body
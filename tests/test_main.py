@@ -0,0 +1,223 @@
+import gzip
+import json
+from pathlib import Path
+from typing import Any
+
+from flask.testing import FlaskClient
+import pytest
+import zstandard
+
+from wumpus.admission import ADMISSION
+from wumpus.compression import MAX_DECOMPRESSED_SIZE
+from wumpus.main import app
+from wumpus.registry import CONFIG_REGISTRY
+
+
+@pytest.fixture
+def client() -> FlaskClient:
+    return app.test_client()
+
+
+def test_sanitize(client: FlaskClient) -> None:
+    response = client.post("/v1/sanitize", json={"members": [{"id": "1", "username": "!test", "nickname": None}]})
+    assert response.status_code == 200
+    assert response.json == {"1": "test"}
+
+    members = [{"id": "1", "username": "!test", "nickname": None}, {"id": "2", "username": "test", "nickname": None}]
+    response = client.post("/v1/sanitize", json={"members": members, "changed_only": True})
+    assert response.status_code == 200
+    assert response.json == {"members": {"1": "test"}, "unchanged": 1}
+
+    response = client.post("/v1/sanitize", json={"members": []})
+    assert response.status_code == 400
+    assert response.json is not None and response.json["message"] == "Bad Request"
+
+    response = client.post("/v1/sanitize", data="{", content_type="application/json")
+    assert response.status_code == 400
+    assert response.json == {"message": "Bad Request"}
+
+    response = client.post("/v1/sanitize", data="{}", content_type="text/plain")
+    assert response.status_code == 400
+
+
+def test_sanitize_member(client: FlaskClient) -> None:
+    member = {"id": "1", "username": "!test", "nickname": None}
+    response = client.post("/v1/sanitize/member", json={"member": member, "max_consecutive": 2})
+    assert response.status_code == 200
+    assert response.json == {"1": "test"}
+
+    response = client.post("/v1/sanitize/member", json={"member": member, "changed_only": True})
+    assert response.json == {"members": {"1": "test"}, "unchanged": 0}
+
+    member = {"id": "1", "username": "test"}
+    response = client.post("/v1/sanitize/member", json={"member": member, "changed_only": True})
+    assert response.json == {"members": {}, "unchanged": 1}
+
+    response = client.post("/v1/sanitize/member", json={"member": {"id": "1"}})
+    assert response.status_code == 400
+    assert response.json is not None and response.json["errors"][0]["loc"] == ["member", "username"]
+
+
+def test_sanitize_overloaded(client: FlaskClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ADMISSION, "budget", 10)
+    monkeypatch.setattr(ADMISSION, "max_queued", 0)
+    monkeypatch.setattr(ADMISSION, "in_flight", 10)
+
+    response = client.post("/v1/sanitize", json={"members": [{"id": "1", "username": "test", "nickname": None}]})
+    assert response.status_code == 429
+    assert response.json == {"message": "Too Many Requests"}
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_sanitize_stream_overloaded(client: FlaskClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    lines = [{}, *({"id": str(i), "username": "test", "nickname": None} for i in range(250))]
+    body = "\n".join(json.dumps(line) for line in lines) + "\n"
+    monkeypatch.setattr(ADMISSION, "budget", 10)
+    monkeypatch.setattr(ADMISSION, "max_queued", 0)
+    monkeypatch.setattr(ADMISSION, "in_flight", 10)
+
+    response = client.post("/v1/sanitize/stream", data=body)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+    # Once the first batch is sent, a rejected batch ends the stream.
+    monkeypatch.setattr(ADMISSION, "in_flight", 0)
+    response = client.post("/v1/sanitize/stream", data=body)
+    assert response.status_code == 200
+
+    monkeypatch.setattr(ADMISSION, "in_flight", 10)
+    results = [json.loads(line) for line in response.get_data().splitlines()]
+    assert len(results) == 101
+    assert results[-1] == {"message": "Too Many Requests", "retry_after": 1, "line": 102}
+
+
+def test_configs(client: FlaskClient, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    assert client.post("/v1/configs", json={}).status_code == 404
+    response = client.post("/v1/sanitize", json={"config_id": "x", "members": [{"id": "1", "username": "!test"}]})
+    assert response.status_code == 404
+
+    monkeypatch.setattr(CONFIG_REGISTRY, "path", str(tmp_path / "configs.db"))
+
+    response = client.post("/v1/configs", json={"max_consecutive": 2})
+    assert response.status_code == 201
+    assert response.json is not None and response.json["version"] == 1 and response.json["max_consecutive"] == 2
+    config_id = response.json["id"]
+
+    members = [{"id": "1", "username": "teeest", "nickname": None}, {"id": "2", "username": "test", "nickname": None}]
+    response = client.post("/v1/sanitize", json={"config_id": config_id, "members": members})
+    assert response.json == {"1": "teest", "2": "test"}
+
+    response = client.put(f"/v1/configs/{config_id}", json={"max_consecutive": 3})
+    assert response.json is not None and response.json["version"] == 2
+
+    response = client.post("/v1/sanitize", json={"config_id": config_id, "members": members, "changed_only": True})
+    assert response.json == {"members": {}, "unchanged": 2}
+
+    response = client.get(f"/v1/configs/{config_id}")
+    assert response.json is not None and response.json["max_consecutive"] == 3
+
+    assert client.delete(f"/v1/configs/{config_id}").status_code == 204
+    assert client.get(f"/v1/configs/{config_id}").status_code == 404
+    assert client.delete(f"/v1/configs/{config_id}").status_code == 404
+
+    response = client.post("/v1/sanitize", json={"config_id": config_id, "members": members})
+    assert response.status_code == 404
+    assert response.json == {"message": "Not Found"}
+
+    assert client.post("/v1/configs", json={"max_consecutive": "x"}).status_code == 400
+
+
+def test_sanitize_stream(client: FlaskClient) -> None:
+    lines = [{"max_consecutive": 2, "exclude_users": ["2"]}]
+    lines += [{"id": str(i), "username": "teeest", "nickname": None} for i in range(250)]
+    body = "\n".join(json.dumps(line) for line in lines) + "\n\n"
+
+    response = client.post("/v1/sanitize/stream", data=body)
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+
+    results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(results) == 250
+    assert results[0] == {"0": "teest"}
+    assert results[2] == {"2": "teeest"}
+
+
+def test_sanitize_stream_errors(client: FlaskClient) -> None:
+    response = client.post("/v1/sanitize/stream", data='{"max_consecutive": 100}\n')
+    assert response.status_code == 400
+
+    response = client.post("/v1/sanitize/stream", data="")
+    assert response.status_code == 400
+
+    response = client.post("/v1/sanitize/stream", data="x" * 100_000)
+    assert response.status_code == 413
+
+    body = '{}\n{"id": "1", "username": "test"}\n{"id": "2"}\n{"id": "3", "username": "test"}\n'
+    results = [json.loads(line) for line in client.post("/v1/sanitize/stream", data=body).get_data().splitlines()]
+    assert results[0] == {"1": "test"}
+    assert results[1]["message"] == "Bad Request"
+    assert results[1]["line"] == 3
+    assert len(results) == 2
+
+    # Blank lines still count towards the line numbers in errors.
+    body = '\n{}\n\n{"id": "1", "username": "test"}\n\n{"id": "2"}\n' + "x" * 100_000
+    results = [json.loads(line) for line in client.post("/v1/sanitize/stream", data=body).get_data().splitlines()]
+    assert results[1]["line"] == 6
+
+    body = '\n{}\n\n{"id": "1", "username": "test"}\n\n' + "x" * 100_000
+    results = [json.loads(line) for line in client.post("/v1/sanitize/stream", data=body).get_data().splitlines()]
+    assert results[1]["line"] == 6
+
+
+def test_sanitize_compressed(client: FlaskClient) -> None:
+    members = [{"id": str(i), "username": "!test", "nickname": None} for i in range(100)]
+    body = gzip.compress(json.dumps({"members": members}).encode())
+    headers = {"Content-Encoding": "gzip"}
+
+    response = client.post("/v1/sanitize", data=body, content_type="application/json", headers=headers)
+    assert response.status_code == 200
+    assert response.headers.get("Content-Encoding") is None
+    assert response.json == {str(i): "test" for i in range(100)}
+
+    headers["Accept-Encoding"] = "gzip"
+    response = client.post("/v1/sanitize", data=body, content_type="application/json", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(response.get_data())) == {str(i): "test" for i in range(100)}
+
+    response = client.post("/v1/sanitize", json={"members": members[:1]}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers.get("Content-Encoding") is None
+    assert response.json == {"0": "test"}
+
+    headers = {"Content-Encoding": "br"}
+    assert client.post("/v1/sanitize", data=body, content_type="application/json", headers=headers).status_code == 415
+
+    headers = {"Content-Encoding": "gzip"}
+    response = client.post("/v1/sanitize", data=b"{}", content_type="application/json", headers=headers)
+    assert response.status_code == 400
+
+    bomb = gzip.compress(b" " * (MAX_DECOMPRESSED_SIZE + 1))
+    assert client.post("/v1/sanitize", data=bomb, content_type="application/json", headers=headers).status_code == 413
+
+    lines: list[dict[str, Any]] = [{}, *members]
+    body = gzip.compress(("\n".join(json.dumps(line) for line in lines) + "\n").encode())
+    response = client.post("/v1/sanitize/stream", data=body, headers=headers)
+    assert response.status_code == 200
+    assert len(response.get_data().splitlines()) == 100
+
+    results = client.post("/v1/sanitize/stream", data=body[:-100], headers=headers).get_data().splitlines()
+    assert json.loads(results[-1])["message"] == "Bad Request"
+
+    headers = {"Content-Encoding": "zstd", "Accept-Encoding": "zstd"}
+    body = zstandard.ZstdCompressor().compress(json.dumps({"members": members}).encode())
+    response = client.post("/v1/sanitize", data=body, content_type="application/json", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "zstd"
+    decoded = json.loads(zstandard.ZstdDecompressor().decompress(response.get_data()))
+    assert decoded == {str(i): "test" for i in range(100)}
+
+    body = zstandard.ZstdCompressor().compress(("\n".join(json.dumps(line) for line in lines) + "\n").encode())
+    response = client.post("/v1/sanitize/stream", data=body, headers={"Content-Encoding": "zstd"})
+    assert response.status_code == 200
+    assert [json.loads(line) for line in response.get_data().splitlines()] == [{str(i): "test"} for i in range(100)]
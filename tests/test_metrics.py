@@ -0,0 +1,63 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from wumpus import sanitizer
+from wumpus.cache import RESULT_CACHE
+from wumpus.metrics import Metrics, skip_lap
+from wumpus.sanitizer import Member, SanitizeConfig, SanitizerPlan
+
+
+def test_metrics_disabled() -> None:
+    metrics = Metrics("", flush_interval=0)
+    assert metrics.stopwatch() is skip_lap
+
+    metrics.observe_batch(10, 0.1)
+    assert metrics.counters == {}
+    assert metrics.histograms == {}
+
+
+def test_metrics_render(tmp_path: Path) -> None:
+    RESULT_CACHE.clear()
+    first = Metrics(str(tmp_path), flush_interval=0)
+    first.observe_batch(10, 0.003)
+
+    # Another worker's snapshot, as written by its own flush.
+    second = Metrics(str(tmp_path), flush_interval=60)
+    second.observe_batch(1000, 2)
+    (tmp_path / "0.json").write_text(json.dumps(second.snapshot()))
+
+    lap = first.stopwatch()
+    lap("unidecode")
+    lap("unidecode")
+
+    rendered = first.render()
+    assert "wumpus_members_total 1010" in rendered
+    assert 'wumpus_batch_size_bucket{le="10"} 1' in rendered
+    assert 'wumpus_batch_size_bucket{le="+Inf"} 2' in rendered
+    assert "wumpus_batch_size_count 2" in rendered
+    assert 'wumpus_stage_seconds_bucket{stage="unidecode",le="+Inf"} 2' in rendered
+    assert "wumpus_result_cache_hits_total 0" in rendered
+
+
+def test_metrics_render_large_counts(tmp_path: Path) -> None:
+    metrics = Metrics(str(tmp_path), flush_interval=60)
+
+    for _ in range(3):
+        metrics.observe("wumpus_batch_size", 1)
+
+    metrics.histograms["wumpus_batch_size"][""][0] += 1_234_564
+    rendered = metrics.render()
+    assert 'wumpus_batch_size_bucket{le="1"} 1234567' in rendered
+    assert "wumpus_batch_size_count 1234567" in rendered
+
+
+def test_metrics_dedup(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    metrics = Metrics(str(tmp_path), flush_interval=60)
+    monkeypatch.setattr(sanitizer, "METRICS", metrics)
+
+    members = [Member(id=str(i), username=f"user{i % 4}", nickname=None) for i in range(10)]
+    SanitizerPlan.compile(SanitizeConfig()).sanitize(members)
+    assert metrics.counters["wumpus_dedup_names_total"] == {"": 10}
+    assert metrics.counters["wumpus_dedup_unique_names_total"] == {"": 4}
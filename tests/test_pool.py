@@ -0,0 +1,19 @@
+from wumpus.pool import SanitizerPool
+from wumpus.sanitizer import Member, Sanitizer, SanitizerPlan, SanitizeSchema
+
+
+def test_sanitizer_pool() -> None:
+    members = [Member(id=str(i), username=f"!test{i % 3}", nickname=None, roles=[str(i % 5)]) for i in range(10)]
+    schema = SanitizeSchema(members=members, exclude_roles=["0"])
+    plan = SanitizerPlan.compile(schema)
+
+    pool = SanitizerPool(workers=2, chunk_size=3)
+    try:
+        results = pool.sanitize(plan, schema.members)
+        assert list(results) == [member.id for member in members]
+        assert results == Sanitizer.sanitize(schema)
+        assert pool.sanitize(plan, schema.members, changed_only=True) == Sanitizer.sanitize_changed(schema)
+    finally:
+        pool.close()
+
+    assert SanitizerPool(workers=0, chunk_size=3).sanitize(plan, schema.members) == Sanitizer.sanitize(schema)
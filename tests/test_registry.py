@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pytest
+
+from wumpus import registry as registry_module
+from wumpus.registry import ConfigNotFound, ConfigRegistry
+from wumpus.sanitizer import SanitizeConfig, SanitizerPlan
+
+
+def test_config_registry(tmp_path: Path) -> None:
+    registry = ConfigRegistry(str(tmp_path / "configs.db"))
+    config_id, version = registry.create(SanitizeConfig(max_spaces=2))
+    assert version == 1
+    assert registry.get(config_id) == (SanitizeConfig(max_spaces=2), 1)
+
+    plan = registry.plan(config_id)
+    assert registry.plan(config_id) is plan
+
+    assert registry.update(config_id, SanitizeConfig(max_spaces=3)) == 2
+    assert registry.plan(config_id) is not plan
+    assert registry.plan(config_id).config.max_spaces == 3
+
+    # Another worker sharing the database sees the update.
+    assert ConfigRegistry(registry.path).plan(config_id).config.max_spaces == 3
+
+    registry.delete(config_id)
+    for call in (registry.get, registry.plan, registry.delete):
+        with pytest.raises(ConfigNotFound):
+            call(config_id)
+
+    with pytest.raises(ConfigNotFound):
+        registry.update(config_id, SanitizeConfig())
+
+    with pytest.raises(ConfigNotFound):
+        ConfigRegistry("").plan(config_id)
+
+
+def test_config_registry_threads(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    registry = ConfigRegistry(str(tmp_path / "configs.db"))
+    first, _ = registry.create(SanitizeConfig(max_spaces=2))
+    second, _ = registry.create(SanitizeConfig(max_spaces=3))
+    plan = registry.plan(first)
+    writers: list[threading.Thread] = []
+
+    class Plans(OrderedDict[str, tuple[int, SanitizerPlan]]):
+        def move_to_end(self, key: str, last: bool = True) -> None:
+            # Let another thread evict the plan being read, as if the reader was preempted mid-lookup.
+            if not writers:
+                writers.append(threading.Thread(target=registry.plan, args=(second,)))
+                writers[0].start()
+                writers[0].join(0.1)
+
+            super().move_to_end(key, last)
+
+    monkeypatch.setattr(registry_module, "PLAN_CACHE_SIZE", 1)
+    registry.plans = Plans(registry.plans)
+
+    assert registry.plan(first) is plan
+    writers[0].join()
+    assert list(registry.plans) == [second]
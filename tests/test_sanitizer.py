@@ -1,4 +1,19 @@
-from wumpus.sanitizer import Member, Sanitizer, SanitizeSchema
+import random
+import re
+import timeit
+
+import pytest
+
+from wumpus.cache import RESULT_CACHE
+from wumpus.sanitizer import (
+    BRACKETS_MAPPING,
+    BRACKETS_REGEX,
+    Member,
+    Sanitizer,
+    SanitizeConfig,
+    SanitizerPlan,
+    SanitizeSchema,
+)
 
 
 def test_get_leading_emoji() -> None:
@@ -9,6 +24,12 @@ def test_get_leading_emoji() -> None:
     assert Sanitizer.get_leading_emoji("👀👀abc", 2) == "👀👀"
     assert Sanitizer.get_leading_emoji("👀👀👀abc", 2) == "👀👀"
     assert Sanitizer.get_leading_emoji("👀👀👀abc", 3) == "👀👀👀"
+    assert Sanitizer.get_leading_emoji("👨‍👩‍👧‍👦👀abc", 1) == "👨‍👩‍👧‍👦"
+    assert Sanitizer.get_leading_emoji("👍🏽👍🏽abc", 2) == "👍🏽👍🏽"
+    assert Sanitizer.get_leading_emoji("❤️‍🔥abc", 1) == "❤️‍🔥"
+    assert Sanitizer.get_leading_emoji("🇸🇪abc", 1) == "🇸🇪"
+    assert Sanitizer.get_leading_emoji("1️⃣abc", 1) == "1️⃣"
+    assert Sanitizer.get_leading_emoji("1abc", 1) == ""
 
 
 def test_get_trailing_emoji() -> None:
@@ -19,6 +40,10 @@ def test_get_trailing_emoji() -> None:
     assert Sanitizer.get_trailing_emoji("abc👀👀", 2) == "👀👀"
     assert Sanitizer.get_trailing_emoji("abc👀👀👀", 2) == "👀👀"
     assert Sanitizer.get_trailing_emoji("abc👀👀👀", 3) == "👀👀👀"
+    assert Sanitizer.get_trailing_emoji("abc👀👨‍👩‍👧‍👦", 1) == "👨‍👩‍👧‍👦"
+    assert Sanitizer.get_trailing_emoji("abc👍🏽👍🏽", 2) == "👍🏽👍🏽"
+    assert Sanitizer.get_trailing_emoji("abc🏳️‍🌈", 1) == "🏳️‍🌈"
+    assert Sanitizer.get_trailing_emoji("abc🇸🇪🇸🇪", 1) == "🇸🇪"
 
 
 def test_replace_char_spacing() -> None:
@@ -108,6 +133,20 @@ def test_sanitize_member() -> None:
         == "👀👀 test 👀👀"
     )
 
+    family = "👨‍👩‍👧‍👦"
+    member = Member(id="123", username=family * 5 + "bob" + "👀" * 5, nickname=None, roles=[])
+    schema = SanitizeSchema(members=[member], max_emoji_leading=5, max_emoji_trailing=5)
+    assert Sanitizer.sanitize_member(member, schema) == f"{family * 4} bob"
+
+    member = Member(id="123", username="👀" * 5 + "a" * 20 + "👀" * 20, nickname=None, roles=[])
+    schema = SanitizeSchema(members=[member], max_emoji_leading=5, max_emoji_trailing=20)
+    assert Sanitizer.sanitize_member(member, schema) == f"{'👀' * 5} {'a' * 20} {'👀' * 5}"
+
+    # Single code point emoji can't be split, so they keep the plain length limit, even where it cuts the name.
+    member = Member(id="123", username="👀" * 5 + "a" * 30, nickname=None, roles=[])
+    schema = SanitizeSchema(members=[member], max_emoji_leading=5)
+    assert Sanitizer.sanitize_member(member, schema) == f"{'👀' * 5} {'a' * 26}"
+
     member = Member(id="123", username="█▀█ █▄█ ▀█▀", nickname="ZChange Name", roles=[])
     assert Sanitizer.sanitize_member(member, SanitizeSchema(members=[member])) == "ZChange Name"
     assert Sanitizer.sanitize_member(member, SanitizeSchema(members=[member], strict=True)) == "ZChange Name"
@@ -188,3 +227,210 @@ def test_sanitize_member() -> None:
         Sanitizer.sanitize_member(member, SanitizeSchema(members=[member], strict=True, trailing_heart=False))
         == "test 123"
     )
+
+
+def test_sanitizer_plan() -> None:
+    config = SanitizeConfig(exclude_users=["1", "2"], exclude_roles=["10", "20"], max_consecutive=2)
+    plan = SanitizerPlan.compile(config)
+
+    assert (
+        SanitizerPlan.compile(
+            SanitizeConfig(exclude_users=["2", "1", "1"], exclude_roles=["20", "10"], max_consecutive=2)
+        )
+        is plan
+    )
+    assert (
+        SanitizerPlan.compile(SanitizeConfig(exclude_users=["1"], exclude_roles=["10", "20"], max_consecutive=2))
+        is not plan
+    )
+    assert SanitizerPlan.compile(SanitizeConfig(exclude_users=["1", "2"], exclude_roles=["10", "20"])) is not plan
+
+    member = Member(id="123", username="test", nickname="teeest", roles=[])
+    assert SanitizerPlan.compile(SanitizeSchema(members=[member], **config.dict())) is plan
+
+    assert plan.exclude_users == frozenset({"1", "2"})
+    assert plan.exclude_roles == frozenset({"10", "20"})
+    assert plan.sanitize_member(member) == "teest"
+    assert plan.sanitize_member(Member(id="1", username="test", nickname="teeest", roles=[])) == "teeest"
+    assert plan.sanitize_member(Member(id="123", username="test", nickname="teeest", roles=["20"])) == "teeest"
+    assert plan.sanitize([member, Member(id="456", username="aaa", nickname=None)]) == {"123": "teest", "456": "aa"}
+
+
+def test_sanitize_changed() -> None:
+    members = [
+        Member(id="1", username="test", nickname=None),
+        Member(id="2", username="test", nickname="!test"),
+        Member(id="3", username="!test", nickname=None),
+        Member(id="4", username="!test", nickname=None, roles=["10"]),
+    ]
+    schema = SanitizeSchema(members=members, exclude_roles=["10"], changed_only=True)
+    assert Sanitizer.sanitize_changed(schema) == {"2": "test", "3": "test"}
+
+
+def test_sanitize_deduplicates_names(monkeypatch: pytest.MonkeyPatch) -> None:
+    members = [Member(id=str(i), username="!raid", nickname=None) for i in range(100)]
+    members.append(Member(id="100", username="raid", nickname="!raid", force_username=True))
+    members.append(Member(id="101", username="!raid", nickname=None, roles=["10"]))
+    plan = SanitizerPlan.compile(SanitizeConfig(exclude_roles=["10"]))
+
+    transformed = []
+    transform_name = plan.transform_name
+
+    def record_transform(name: str) -> str:
+        transformed.append(name)
+        return transform_name(name)
+
+    monkeypatch.setattr(plan, "transform_name", record_transform)
+    RESULT_CACHE.clear()
+
+    results = plan.sanitize(members)
+    assert list(results) == [member.id for member in members]
+    assert set(results.values()) == {"raid", "!raid"}
+    assert results["101"] == "!raid"
+    assert transformed == ["!raid", "raid"]
+
+    assert plan.sanitize_changed(members) == {str(i): "raid" for i in range(101)}
+    RESULT_CACHE.clear()
+
+
+def test_ascii_fast_path() -> None:
+    class UnicodeName(str):
+        def isascii(self) -> bool:
+            return False
+
+    names = ["", "   ", "!!test", "(a)(b) c", "TEST <3", "a b c d e", "|| x ||", "teeeest", "#1 *", ":) <3 :)"]
+    names.append("".join(chr(i) for i in range(128)))
+
+    configs = [
+        SanitizeConfig(),
+        SanitizeConfig(
+            max_char_spacing=2,
+            max_consecutive=2,
+            max_consecutive_upper=2,
+            max_emoji_leading=2,
+            max_emoji_trailing=2,
+            max_spaces=3,
+            replace_char="?",
+            strict=True,
+            trailing_trademark=True,
+        ),
+    ]
+
+    for config in configs:
+        plan = SanitizerPlan.compile(config)
+        for name in names:
+            assert plan.transform_name(name) == plan.transform_name(UnicodeName(name))
+
+
+class ReferenceSanitizer:
+    """
+    The original implementations of the rewritten `Sanitizer` helpers, used to check that outputs are unchanged.
+    """
+
+    @staticmethod
+    def replace_consecutive(name: str, max_consecutive: int) -> str:
+        consecutive = 0
+        last_char = None
+        new_name = ""
+
+        for char in name:
+            if char == last_char:
+                consecutive += 1
+            else:
+                consecutive = 1
+
+            if consecutive <= max_consecutive:
+                new_name += char
+
+            last_char = char
+
+        return new_name
+
+    @staticmethod
+    def replace_consecutive_upper(name: str, max_consecutive_upper: int) -> str:
+        consecutive = 0
+        new_name = ""
+
+        for char in name:
+            if char.isupper():
+                consecutive += 1
+            else:
+                consecutive = 0
+
+            if consecutive >= max_consecutive_upper:
+                new_name = name.lower()
+                break
+            else:
+                new_name += char
+
+        return new_name
+
+    @staticmethod
+    def dehoist(name: str) -> str:
+        for char in name:
+            if char.isalnum():
+                break
+            else:
+                name = name[1:]
+
+        return name
+
+    @staticmethod
+    def normalize_brackets(name: str) -> str:
+        matches = re.findall(BRACKETS_REGEX, name)
+        for match in matches:
+            name = name.replace("".join(match), match[1])
+
+        return name
+
+    @staticmethod
+    def strip_dangling_brackets(name: str) -> str:
+        stack = []
+
+        for char in name:
+            if char in BRACKETS_MAPPING.values():
+                stack.append(char)
+            elif char in BRACKETS_MAPPING.keys():
+                if not stack or stack[-1] != BRACKETS_MAPPING[char]:
+                    name = name.replace(char, "")
+                else:
+                    stack.pop()
+
+        while stack:
+            name = name.replace(stack.pop(), "")
+
+        return name.replace("()", "").replace("[]", "").replace("{}", "")
+
+
+def test_normalize_brackets_nested_is_linear() -> None:
+    def nested(count: int) -> str:
+        return "((a))" * count + "(" * count + "a" + ")" * count + "(a)" * count
+
+    def best_time(count: int) -> float:
+        name = nested(count)
+        return min(timeit.repeat(lambda: Sanitizer.normalize_brackets(name), number=1, repeat=3))
+
+    for count in (2_000, 20_000):
+        assert Sanitizer.normalize_brackets(nested(count)) == "a" * (2 * count + 1)
+
+    # Ten times the input should take about ten times as long; a quadratic implementation takes about a hundred.
+    assert best_time(20_000) < best_time(2_000) * 30
+
+
+def test_helpers_match_reference() -> None:
+    rng = random.Random(0)
+    names = ["", "((a))", "(((a)))(a)", "([a])[(b)]", "{(a]}", "aaAAaa", "!!!", "| | a", "x" * 64, "(a" * 32]
+    names += ["".join(rng.choices("aAb1 _!|.-()[]{}", k=rng.randint(0, 40))) for _ in range(5000)]
+    names += ["".join(rng.choices("ab((([[{)))]]}", k=rng.randint(0, 60))) for _ in range(5000)]
+    names += ["((a))" * 20, "(" * 20 + "a" + ")" * 20 + "(a)" * 20, "([{a}])" * 10 + "{[(a)]}" * 10]
+
+    for name in names:
+        assert Sanitizer.dehoist(name) == ReferenceSanitizer.dehoist(name)
+        assert Sanitizer.normalize_brackets(name) == ReferenceSanitizer.normalize_brackets(name)
+        assert Sanitizer.strip_dangling_brackets(name) == ReferenceSanitizer.strip_dangling_brackets(name)
+
+        for limit in range(4):
+            assert Sanitizer.replace_consecutive(name, limit) == ReferenceSanitizer.replace_consecutive(name, limit)
+            assert Sanitizer.replace_consecutive_upper(name, limit) == ReferenceSanitizer.replace_consecutive_upper(
+                name, limit
+            )
@@ -0,0 +1,37 @@
+from unidecode import unidecode
+
+from wumpus.sanitizer import emoji_table, transliteration_table
+from wumpus.transliteration import TransliterationTable
+
+NAMES = [
+    "",
+    "test",
+    "𝗨𝗻𝗸𝗻𝗼𝘄𝗻 ©®™",
+    "🇸🇪 🅰🅱",
+    "ಥ‿ಥ 丶↘☣",
+    "👨‍👩‍👧‍👦 Ézz",
+    "\U000f0000 \U0010ffff",
+]
+
+
+def test_transliteration_table() -> None:
+    codepoints = [*range(0, 0xD800, 7), *range(0xE000, 0x30000, 7), *range(0x1F100, 0x1F200)]
+    names = NAMES + ["".join(map(chr, codepoints[i : i + 50])) for i in range(0, len(codepoints), 50)]
+
+    for replace_char in ["", "?"]:
+        for normalize_regional in [True, False]:
+            table = transliteration_table(normalize_regional)
+            pre_table = emoji_table(normalize_regional)
+
+            for name in names:
+                expected = unidecode(name.translate(pre_table), errors="replace", replace_str=replace_char)
+                assert table.transliterate(name, replace_char) == expected
+
+
+def test_transliteration_table_bounded() -> None:
+    table = TransliterationTable({})
+    unmapped = "".join(map(chr, range(0xF0000, 0xF1000)))
+
+    assert table.transliterate(unmapped, "?") == "?" * 0x1000
+    assert table.transliterate(unmapped + "é", "") == "e"
+    assert len(table) == 1
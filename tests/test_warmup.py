@@ -0,0 +1,19 @@
+import unidecode
+
+from wumpus.cache import RESULT_CACHE
+from wumpus.main import app
+from wumpus.sanitizer import SanitizeConfig, SanitizerPlan
+from wumpus.warmup import load_transliterations, warm_up
+
+
+def test_warm_up() -> None:
+    warm_up(app)
+
+    sections = load_transliterations()
+    assert len(sections) > 100
+    assert all(section >> 8 in unidecode.Cache for section in sections)
+
+    table = SanitizerPlan.compile(SanitizeConfig()).transliteration_table
+    assert len(table) > 10000
+    assert table[0x1D4E1] == "R"
+    assert len(RESULT_CACHE) == 0
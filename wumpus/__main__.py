@@ -0,0 +1,5 @@
+import sys
+
+from wumpus.cli import main
+
+sys.exit(main())
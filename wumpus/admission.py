@@ -0,0 +1,108 @@
+import contextlib
+import heapq
+import itertools
+import os
+import threading
+from typing import Iterator, Sequence
+
+from wumpus.metrics import METRICS
+from wumpus.sanitizer import MemberLike
+
+ADMISSION_BUDGET = float(os.environ.get("WUMPUS_ADMISSION_BUDGET", 0))
+ADMISSION_MAX_QUEUED = int(os.environ.get("WUMPUS_ADMISSION_MAX_QUEUED", 100))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("WUMPUS_ADMISSION_QUEUE_TIMEOUT", 1))
+ADMISSION_RETRY_AFTER = 1
+
+# A name of this many characters costs as much again as the member itself.
+NAME_LENGTH_UNIT = 32
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Too Many Requests")
+        self.retry_after = retry_after
+
+
+def estimate_cost(members: Sequence[MemberLike]) -> float:
+    """
+    Estimate the work of sanitizing members from their count and the length of their names.
+    """
+
+    return len(members) + sum(len(member.nickname or member.username) for member in members) / NAME_LENGTH_UNIT
+
+
+class AdmissionController:
+    """
+    Per-worker admission control that bounds the estimated cost of the requests being sanitized at once.
+
+    A request runs at once if it fits in the remaining `budget` and no cheaper request is waiting. Otherwise it
+    queues, cheapest first, so small interactive requests overtake bulk syncs. A request is rejected with
+    `Overloaded` when `max_queued` requests are already waiting, or when it waited `queue_timeout` seconds.
+    A request costing more than the whole budget runs once nothing else does. A `budget` of 0 disables admission
+    control.
+    """
+
+    def __init__(self, budget: float, max_queued: int, queue_timeout: float, retry_after: int) -> None:
+        self.budget = budget
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0.0
+        self.lock = threading.Lock()
+        self.queue: list[tuple[float, int, threading.Event]] = []
+        self.sequence = itertools.count()
+
+    @contextlib.contextmanager
+    def admit(self, cost: float) -> Iterator[None]:
+        if not self.budget:
+            yield
+            return
+
+        cost = min(cost, self.budget)
+        self.acquire(cost)
+
+        try:
+            yield
+        finally:
+            self.release(cost)
+
+    def acquire(self, cost: float) -> None:
+        with self.lock:
+            if self.in_flight + cost <= self.budget and (not self.queue or cost < self.queue[0][0]):
+                self.in_flight += cost
+                return
+
+            if len(self.queue) >= self.max_queued:
+                METRICS.inc("wumpus_admission_rejected_total")
+                raise Overloaded(self.retry_after)
+
+            entry = (cost, next(self.sequence), threading.Event())
+            heapq.heappush(self.queue, entry)
+
+        METRICS.inc("wumpus_admission_queued_total")
+
+        if entry[2].wait(self.queue_timeout):
+            return
+
+        with self.lock:
+            # The request may have been admitted between the timeout and taking the lock.
+            if entry[2].is_set():
+                return
+
+            self.queue.remove(entry)
+            heapq.heapify(self.queue)
+
+        METRICS.inc("wumpus_admission_rejected_total")
+        raise Overloaded(self.retry_after)
+
+    def release(self, cost: float) -> None:
+        with self.lock:
+            self.in_flight -= cost
+
+            while self.queue and self.in_flight + self.queue[0][0] <= self.budget:
+                queued_cost, _, event = heapq.heappop(self.queue)
+                self.in_flight += queued_cost
+                event.set()
+
+
+ADMISSION = AdmissionController(ADMISSION_BUDGET, ADMISSION_MAX_QUEUED, ADMISSION_QUEUE_TIMEOUT, ADMISSION_RETRY_AFTER)
@@ -0,0 +1,229 @@
+import asyncio
+import os
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable
+
+import sentry_sdk
+from pydantic import ValidationError
+from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
+
+from wumpus.admission import Overloaded
+from wumpus.codec import dumps, loads
+from wumpus.compression import DecompressedTooLarge, UnsupportedEncoding, decode_body, encode_body
+from wumpus.handlers import sanitize_member_payload, sanitize_payload
+from wumpus.metrics import METRICS
+from wumpus.pool import POOL_WORKERS
+from wumpus.registry import CONFIG_REGISTRY, ConfigNotFound
+from wumpus.sanitizer import SanitizeConfig
+
+SENTRY_DSN = os.environ.get("SENTRY_DSN")
+sentry_sdk.init(SENTRY_DSN)
+
+MAX_BODY_SIZE = int(os.environ.get("WUMPUS_ASGI_MAX_BODY_SIZE", 8 * 1024 * 1024))
+MAX_CONCURRENCY = int(os.environ.get("WUMPUS_ASGI_MAX_CONCURRENCY", max(POOL_WORKERS, 1)))
+MAX_PENDING = int(os.environ.get("WUMPUS_ASGI_MAX_PENDING", 25))
+RETRY_AFTER = 1
+
+Scope = dict[str, Any]
+Message = dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, headers: list[tuple[bytes, bytes]] | None = None) -> None:
+        super().__init__(status.phrase)
+        self.status = status
+        self.headers = headers or []
+
+
+class WumpusASGI:
+    """
+    ASGI app serving the `/v1/sanitize`, `/v1/sanitize/member` and `/v1/configs` contracts of `wumpus.main` without
+    gevent. `/v1/sanitize/stream` is only served by `wumpus.main`.
+
+    The body is read and JSON-decoded on the event loop, while validation, sanitization and config registry queries
+    run in an executor.
+    At most `max_concurrency` requests are sanitized at once; once `max_pending` requests are waiting or running,
+    new requests are rejected with 503 and `Retry-After` instead of queueing without bound.
+    """
+
+    def __init__(self, max_body_size: int, max_concurrency: int, max_pending: int) -> None:
+        self.max_body_size = max_body_size
+        self.max_pending = max_pending
+        self.pending = 0
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+
+        if scope["type"] != "http":
+            return
+
+        try:
+            if scope["path"] == "/metrics" and METRICS.enabled:
+                await self.respond_metrics(scope, send)
+                return
+
+            if scope["path"] == "/v1/configs" or scope["path"].startswith("/v1/configs/"):
+                await self.respond_config(scope, receive, send)
+                return
+
+            if scope["path"] not in ("/v1/sanitize", "/v1/sanitize/member"):
+                raise HTTPError(HTTPStatus.NOT_FOUND)
+
+            if scope["method"] != "POST":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, [(b"allow", b"POST")])
+
+            payload = await self.read_json(scope, receive)
+            handler = sanitize_payload if scope["path"] == "/v1/sanitize" else sanitize_member_payload
+            body = await self.sanitize(handler, payload)
+            accept_encoding = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+            await self.respond(send, HTTPStatus.OK, body, accept_encoding=accept_encoding)
+        except HTTPError as error:
+            await self.respond(send, error.status, {"message": error.status.phrase}, error.headers)
+        except Overloaded as error:
+            headers = [(b"retry-after", str(error.retry_after).encode())]
+            message = {"message": HTTPStatus.TOO_MANY_REQUESTS.phrase}
+            await self.respond(send, HTTPStatus.TOO_MANY_REQUESTS, message, headers)
+        except ConfigNotFound:
+            await self.respond(send, HTTPStatus.NOT_FOUND, {"message": HTTPStatus.NOT_FOUND.phrase})
+        except ValidationError as error:
+            await self.respond(send, HTTPStatus.BAD_REQUEST, {"message": "Bad Request", "errors": error.errors()})
+
+    async def lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def read_json(self, scope: Scope, receive: Receive) -> Any:
+        headers = dict(scope["headers"])
+        content_type = headers.get(b"content-type", b"").split(b";")[0].strip()
+
+        if content_type != b"application/json" and not content_type.endswith(b"+json"):
+            raise HTTPError(HTTPStatus.BAD_REQUEST)
+
+        body = bytearray()
+        more_body = True
+
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if len(body) > self.max_body_size:
+                raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+
+        try:
+            return loads(decode_body(bytes(body), headers.get(b"content-encoding", b"").decode("latin-1")))
+        except UnsupportedEncoding:
+            raise HTTPError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
+        except DecompressedTooLarge:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST)
+
+    async def sanitize(self, handler: Callable[[Any], dict[str, Any]], payload: Any) -> dict[str, Any]:
+        if self.pending >= self.max_pending:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, [(b"retry-after", str(RETRY_AFTER).encode())])
+
+        self.pending += 1
+        try:
+            async with self.semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, handler, payload)
+        finally:
+            self.pending -= 1
+
+    async def respond_config(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Serve `POST /v1/configs` and `GET`, `PUT` and `DELETE /v1/configs/<config_id>`.
+        """
+
+        path, method = scope["path"], scope["method"]
+        config_id = path.removeprefix("/v1/configs/") if path != "/v1/configs" else ""
+
+        if path != "/v1/configs" and (not config_id or "/" in config_id):
+            raise HTTPError(HTTPStatus.NOT_FOUND)
+
+        allowed = ("GET", "PUT", "DELETE") if config_id else ("POST",)
+
+        if method not in allowed:
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, [(b"allow", ", ".join(allowed).encode())])
+
+        if not CONFIG_REGISTRY.enabled:
+            raise HTTPError(HTTPStatus.NOT_FOUND)
+
+        loop = asyncio.get_running_loop()
+
+        if method == "DELETE":
+            await loop.run_in_executor(None, CONFIG_REGISTRY.delete, config_id)
+            await send({"type": "http.response.start", "status": 204, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if method == "GET":
+            config, version = await loop.run_in_executor(None, CONFIG_REGISTRY.get, config_id)
+            await self.respond(send, HTTPStatus.OK, {"id": config_id, "version": version, **config.dict()})
+            return
+
+        config = SanitizeConfig.parse_obj(await self.read_json(scope, receive) or {})
+
+        if method == "POST":
+            config_id, version = await loop.run_in_executor(None, CONFIG_REGISTRY.create, config)
+            await self.respond(send, HTTPStatus.CREATED, {"id": config_id, "version": version, **config.dict()})
+        else:
+            version = await loop.run_in_executor(None, CONFIG_REGISTRY.update, config_id, config)
+            await self.respond(send, HTTPStatus.OK, {"id": config_id, "version": version, **config.dict()})
+
+    async def respond_metrics(self, scope: Scope, send: Send) -> None:
+        if scope["method"] != "GET":
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, [(b"allow", b"GET")])
+
+        encoded = METRICS.render().encode()
+        headers = [(b"content-type", b"text/plain; version=0.0.4"), (b"content-length", str(len(encoded)).encode())]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": encoded})
+
+    async def respond(
+        self,
+        send: Send,
+        status: HTTPStatus,
+        body: dict[str, Any],
+        headers: list[tuple[bytes, bytes]] | None = None,
+        accept_encoding: str | None = None,
+    ) -> None:
+        """
+        Send a JSON response, compressed when `accept_encoding` is given and allows a supported coding.
+        """
+
+        encoded, encoding = encode_body(dumps(body), accept_encoding or "")
+
+        if accept_encoding is not None:
+            headers = [*(headers or []), (b"vary", b"Accept-Encoding")]
+
+        if encoding:
+            headers = [*(headers or []), (b"content-encoding", encoding.encode())]
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": int(status),
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(encoded)).encode()),
+                    *(headers or []),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": encoded})
+
+
+app = SentryAsgiMiddleware(WumpusASGI(MAX_BODY_SIZE, MAX_CONCURRENCY, MAX_PENDING))
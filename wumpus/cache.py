@@ -0,0 +1,331 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Protocol
+
+try:
+    import redis  # type: ignore[import]
+except ImportError:
+    redis = None
+
+RESULT_CACHE_SIZE = int(os.environ.get("WUMPUS_RESULT_CACHE_SIZE", 65536))
+RESULT_CACHE_TTL = float(os.environ.get("WUMPUS_RESULT_CACHE_TTL", 3600))
+SHARED_CACHE_URL = os.environ.get("WUMPUS_SHARED_CACHE_URL", "")
+SHARED_CACHE_SIZE = int(os.environ.get("WUMPUS_SHARED_CACHE_SIZE", 1_000_000))
+SHARED_CACHE_WRITE_BATCH = 512
+# Part of every shared cache key. Bump it whenever a change alters sanitized output, so results stored by an older
+# release are never served after a deploy.
+SHARED_CACHE_VERSION = 2
+
+CacheKey = tuple[str, str]
+
+
+def content_key(key: CacheKey) -> bytes:
+    """
+    Hash a (name, config fingerprint) key and the cache version into the fixed-size key used by shared backends.
+    """
+
+    name, fingerprint = key
+    data = f"{SHARED_CACHE_VERSION}:{fingerprint}".encode() + name.encode("utf-8", "surrogatepass")
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class SharedCache(Protocol):
+    def get_many(self, keys: list[bytes]) -> dict[bytes, str]:
+        ...
+
+    def set_many(self, items: list[tuple[bytes, str]]) -> None:
+        ...
+
+
+class SQLiteCache:
+    """
+    Results stored in a SQLite database shared by every process on the machine, surviving restarts.
+
+    Entries expire `ttl` seconds after they were stored. Once the table holds more than `maxsize` entries, the
+    oldest are evicted, checked every `maxsize // 10` writes. Lookups and writes are best effort: a locked or
+    unavailable database is treated as a miss, and the write is dropped.
+    """
+
+    def __init__(self, path: str, maxsize: int, ttl: float) -> None:
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evict_interval = max(maxsize // 10, 1)
+        self.writes = 0
+        self.lock = threading.Lock()
+        self.connection: sqlite3.Connection | None = None
+        self.connection_key: tuple[str, int] | None = None
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Get this process's connection, opening it on first use (connections must not be shared across a fork).
+        """
+
+        key = (self.path, os.getpid())
+
+        if self.connection is None or self.connection_key != key:
+            connection = sqlite3.connect(self.path, timeout=0.1, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key BLOB PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self.connection = connection
+            self.connection_key = key
+
+        return self.connection
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, str]:
+        results: dict[bytes, str] = {}
+        now = time.time()
+
+        try:
+            with self.lock:
+                connection = self.connect()
+
+                # Stay under SQLite's default limit of 999 bound parameters.
+                for i in range(0, len(keys), 900):
+                    chunk = keys[i : i + 900]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = connection.execute(
+                        f"SELECT key, value FROM results WHERE key IN ({placeholders}) AND expires_at > ?",
+                        (*chunk, now),
+                    )
+                    results.update(rows)
+        except sqlite3.Error:
+            pass
+
+        return results
+
+    def set_many(self, items: list[tuple[bytes, str]]) -> None:
+        expires_at = time.time() + self.ttl
+
+        try:
+            with self.lock:
+                connection = self.connect()
+
+                with connection:
+                    connection.execute("BEGIN")
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                        [(key, value, expires_at) for key, value in items],
+                    )
+
+                self.writes += len(items)
+                if self.writes >= self.evict_interval:
+                    self.writes = 0
+                    self.evict(connection)
+        except sqlite3.Error:
+            pass
+
+    def evict(self, connection: sqlite3.Connection) -> None:
+        """
+        Delete expired entries, then the oldest entries over `maxsize` (rowids grow with every insert or replace).
+        """
+
+        connection.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+        (count,) = connection.execute("SELECT count(*) FROM results").fetchone()
+
+        if count > self.maxsize:
+            connection.execute(
+                "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY rowid LIMIT ?)",
+                (count - self.maxsize,),
+            )
+
+
+class RedisCache:
+    """
+    Results stored in Redis or a Redis-compatible server (such as Valkey, KeyDB or Dragonfly), shared across
+    machines. Entries expire after `ttl` seconds, and the server's `maxmemory` policy bounds the size.
+    Connection and server errors are treated as a miss, and the write is dropped.
+    """
+
+    def __init__(self, client: Any, ttl: float) -> None:
+        self.client = client
+        self.ttl = max(int(ttl), 1)
+
+    @staticmethod
+    def from_url(url: str, ttl: float) -> "RedisCache":
+        if redis is None:
+            raise RuntimeError("The redis package is required for a redis:// shared cache")
+
+        return RedisCache(redis.Redis.from_url(url, socket_timeout=0.1), ttl)
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, str]:
+        try:
+            values = self.client.mget([b"wumpus:" + key for key in keys])
+        except redis.RedisError:
+            return {}
+
+        return {key: value.decode() for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, items: list[tuple[bytes, str]]) -> None:
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            for key, value in items:
+                pipeline.set(b"wumpus:" + key, value.encode(), ex=self.ttl)
+            pipeline.execute()
+        except redis.RedisError:
+            pass
+
+
+def open_shared_cache(url: str, maxsize: int, ttl: float) -> SharedCache | None:
+    """
+    Open the shared backend for a `sqlite:///path/to/cache.db` or `redis://` URL, or none for an empty URL.
+    """
+
+    if not url:
+        return None
+
+    if url.startswith("sqlite://"):
+        return SQLiteCache(url.removeprefix("sqlite://"), maxsize, ttl)
+
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache.from_url(url, ttl)
+
+    raise ValueError(f"Unsupported shared cache URL: {url}")
+
+
+class ResultCache:
+    """
+    Bounded in-process LRU cache of sanitized names, keyed by (name, config fingerprint), optionally backed by a
+    cache shared with other processes.
+
+    Entries expire `ttl` seconds after they were stored. A `maxsize` of 0 disables the in-process cache.
+
+    Local misses fall through to the shared cache, and new results are written to it in batches on `flush`.
+    `prefetch` loads a whole batch of keys from the shared cache in one round trip, and keys it did not find are not
+    looked up again until the next `flush`. It is safe to use from several threads, as the ASGI app does.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, shared: SharedCache | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.entries: OrderedDict[CacheKey, tuple[float, str]] = OrderedDict()
+        self.pending: list[tuple[bytes, str]] = []
+        self.checked: set[CacheKey] = set()
+        # Guards the fields above; shared cache round trips happen outside it.
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: CacheKey) -> str | None:
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is not None:
+                expires_at, value = entry
+
+                if expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+
+                del self.entries[key]
+
+            shared = self.shared if key not in self.checked else None
+
+        if shared is not None:
+            digest = content_key(key)
+            shared_value = shared.get_many([digest]).get(digest)
+
+            if shared_value is not None:
+                with self.lock:
+                    self.store_locked(key, shared_value)
+                    self.hits += 1
+                    self.shared_hits += 1
+
+                return shared_value
+
+        with self.lock:
+            self.misses += 1
+
+        return None
+
+    def prefetch(self, keys: Iterable[CacheKey]) -> None:
+        if self.shared is None:
+            return
+
+        now = time.monotonic()
+        missing = {}
+
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if (entry is None or entry[0] <= now) and key not in self.checked:
+                    missing[content_key(key)] = key
+
+        if not missing:
+            return
+
+        found = self.shared.get_many(list(missing))
+
+        with self.lock:
+            for digest, key in missing.items():
+                value = found.get(digest)
+
+                if value is None:
+                    self.checked.add(key)
+                else:
+                    self.store_locked(key, value)
+
+            self.shared_hits += len(found)
+
+    def set(self, key: CacheKey, value: str) -> None:
+        with self.lock:
+            self.store_locked(key, value)
+
+            if self.shared is None:
+                return
+
+            self.pending.append((content_key(key), value))
+            full = len(self.pending) >= SHARED_CACHE_WRITE_BATCH
+
+        if full:
+            self.flush()
+
+    def store_locked(self, key: CacheKey, value: str) -> None:
+        if not self.maxsize:
+            return
+
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def flush(self) -> None:
+        """
+        Write new results to the shared cache, and forget which keys the shared cache was missing.
+        """
+
+        with self.lock:
+            self.checked.clear()
+            pending, self.pending = self.pending, []
+
+        if self.shared is not None and pending:
+            self.shared.set_many(pending)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.pending.clear()
+            self.checked.clear()
+            self.hits = 0
+            self.misses = 0
+            self.shared_hits = 0
+
+
+RESULT_CACHE = ResultCache(
+    RESULT_CACHE_SIZE, RESULT_CACHE_TTL, open_shared_cache(SHARED_CACHE_URL, SHARED_CACHE_SIZE, RESULT_CACHE_TTL)
+)
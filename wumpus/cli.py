@@ -0,0 +1,216 @@
+"""
+Sanitize member dumps offline with the same pipeline as the API.
+
+    python -m wumpus members.jsonl --config config.json --output sanitized.jsonl
+    python -m wumpus members.csv --changed-only --workers 8 > changed.csv
+
+JSONL input has one member object per line, as in `/v1/sanitize/stream`. CSV input has a header row with the
+member fields as columns; `roles` holds space-separated role IDs, and an empty cell means no value.
+Output uses the input's format: `{"<id>": "<name>"}` lines for JSONL, or `id,name` rows for CSV.
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import IO, Any, Iterator
+
+from pydantic import ValidationError
+
+from wumpus.codec import dumps
+from wumpus.sanitizer import Member, MemberLike, SanitizeConfig, SanitizeOptions, SanitizerPlan
+from wumpus.stream import decode_line
+
+CHUNK_SIZE = 1000
+PROGRESS_INTERVAL = 1.0
+
+Record = tuple[int, Any]
+
+
+class ChunkResult:
+    __slots__ = ("output", "members", "changed", "errors")
+
+    def __init__(self, output: bytes, members: int, changed: int, errors: list[str]) -> None:
+        self.output = output
+        self.members = members
+        self.changed = changed
+        self.errors = errors
+
+
+def decode_row(row: dict[str, str]) -> Member:
+    return Member.parse_obj(
+        {
+            "id": row.get("id") or None,
+            "username": row.get("username") or None,
+            "nickname": row.get("nickname") or None,
+            "roles": (row.get("roles") or "").split(),
+            "force_username": row.get("force_username") or False,
+        }
+    )
+
+
+def encode_results(results: list[tuple[str, str]], input_format: str) -> bytes:
+    if input_format == "csv":
+        buffer = io.StringIO(newline="")
+        csv.writer(buffer, lineterminator="\n").writerows(results)
+        return buffer.getvalue().encode()
+
+    return b"".join(dumps({id: name}) + b"\n" for id, name in results)
+
+
+def process_chunk(config: SanitizeConfig, input_format: str, records: list[Record], changed_only: bool) -> ChunkResult:
+    """
+    Decode, validate and sanitize a chunk of records, returning the encoded output. Invalid records are skipped
+    and reported by line number.
+    """
+
+    members: list[MemberLike] = []
+    errors = []
+
+    for line_number, record in records:
+        try:
+            members.append(decode_row(record) if input_format == "csv" else decode_line(record))
+        except ValidationError as error:
+            errors.append(f"line {line_number}: {dumps(error.errors()).decode()}")
+
+    results = []
+    changed = 0
+
+    for member, name in zip(members, SanitizerPlan.compile(config).sanitize_batch(members)):
+        if name != (member.nickname or member.username):
+            changed += 1
+        elif changed_only:
+            continue
+
+        results.append((member.id, name))
+
+    return ChunkResult(encode_results(results, input_format), len(members), changed, errors)
+
+
+def read_records(file: IO[bytes], input_format: str) -> Iterator[Record]:
+    """
+    Read (line number, record) pairs one at a time: CSV rows as dicts, and JSONL lines as bytes, skipping blank lines.
+    """
+
+    if input_format == "csv":
+        reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8", newline=""))
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(file, start=1):
+            line = line.strip()
+            if line:
+                yield line_number, line
+
+
+def iter_chunks(records: Iterator[Record], chunk_size: int) -> Iterator[list[Record]]:
+    while chunk := list(itertools.islice(records, chunk_size)):
+        yield chunk
+
+
+def process_chunks(
+    chunks: Iterator[list[Record]], config: SanitizeConfig, input_format: str, changed_only: bool, workers: int
+) -> Iterator[ChunkResult]:
+    """
+    Process chunks across `workers` processes, yielding results in input order. At most two chunks per worker are
+    in flight, so memory stays bounded however large the input is.
+    """
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield process_chunk(config, input_format, chunk, changed_only)
+
+        return
+
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        pending: deque[Future[ChunkResult]] = deque()
+
+        for chunk in chunks:
+            pending.append(executor.submit(process_chunk, config, input_format, chunk, changed_only))
+
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+class Progress:
+    def __init__(self, file: IO[str] | None) -> None:
+        self.file = file
+        self.start = self.last = time.monotonic()
+        self.members = 0
+        self.changed = 0
+        self.invalid = 0
+
+    def update(self, result: ChunkResult) -> None:
+        self.members += result.members
+        self.changed += result.changed
+        self.invalid += len(result.errors)
+
+        now = time.monotonic()
+        if now - self.last >= PROGRESS_INTERVAL:
+            self.last = now
+            self.report()
+
+    def report(self) -> None:
+        if self.file is None:
+            return
+
+        elapsed = time.monotonic() - self.start
+        rate = self.members / elapsed if elapsed else 0
+        print(
+            f"{self.members:,} members, {self.changed:,} changed, {self.invalid:,} invalid"
+            f" in {elapsed:.1f}s ({rate:,.0f} members/s)",
+            file=self.file,
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m wumpus", description="Sanitize a JSONL or CSV member dump.")
+    parser.add_argument("input", help="member dump, or - for stdin")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="input format (default: from the file extension)")
+    parser.add_argument("--config", metavar="PATH", help="JSON sanitize config (a /v1/sanitize body without members)")
+    parser.add_argument("--output", metavar="PATH", help="output file (default: stdout)")
+    parser.add_argument("--changed-only", action="store_true", help="only write members whose name changes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="members per chunk sent to a process")
+    parser.add_argument("--quiet", action="store_true", help="don't print progress")
+    args = parser.parse_args(argv)
+
+    input_format = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    options = SanitizeOptions.parse_file(args.config) if args.config else SanitizeOptions()
+    config = SanitizeConfig.construct(**options.dict(include=set(SanitizeConfig.__fields__)))
+    changed_only = args.changed_only or options.changed_only
+
+    input_file = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    output_file = sys.stdout.buffer if args.output is None else open(args.output, "wb")
+    progress = Progress(None if args.quiet else sys.stderr)
+
+    try:
+        if input_format == "csv":
+            output_file.write(b"id,name\n")
+
+        chunks = iter_chunks(read_records(input_file, input_format), max(args.chunk_size, 1))
+
+        for result in process_chunks(chunks, config, input_format, changed_only, args.workers):
+            output_file.write(result.output)
+
+            for error in result.errors:
+                print(error, file=sys.stderr)
+
+            progress.update(result)
+    finally:
+        if input_file is not sys.stdin.buffer:
+            input_file.close()
+        if output_file is not sys.stdout.buffer:
+            output_file.close()
+
+    progress.report()
+    return 1 if progress.invalid else 0
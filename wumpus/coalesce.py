@@ -0,0 +1,90 @@
+import os
+import threading
+import time
+
+from wumpus.metrics import METRICS
+from wumpus.sanitizer import MemberLike, SanitizerPlan
+
+COALESCE_MAX_SIZE = int(os.environ.get("WUMPUS_COALESCE_MAX_SIZE", 250))
+COALESCE_WINDOW = float(os.environ.get("WUMPUS_COALESCE_WINDOW", 0))
+
+
+class PendingBatch:
+    __slots__ = ("plan", "members", "results", "error", "full", "done")
+
+    def __init__(self, plan: SanitizerPlan) -> None:
+        self.plan = plan
+        self.members: list[MemberLike] = []
+        self.results: list[str] = []
+        self.error: BaseException | None = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class Coalescer:
+    """
+    Coalesce concurrent single-member sanitizations that share a config into one batch.
+
+    The first caller for a config opens a batch and waits up to `window` seconds (less if `max_size` members join),
+    then sanitizes the whole batch while the other callers wait for their result. Under gevent the events and lock
+    are cooperative, so this coalesces the requests handled by one worker.
+
+    The leader cannot know whether anyone will join, so every batch pays the full `window` in latency unless it
+    fills up, including a lone request during quiet periods. That only pays off under bursts of same-config traffic,
+    so the default `window` is 0, which disables coalescing and sanitizes each member immediately.
+    """
+
+    def __init__(self, max_size: int, window: float) -> None:
+        self.max_size = max(max_size, 1)
+        self.window = window
+        self.lock = threading.Lock()
+        self.batches: dict[str, PendingBatch] = {}
+
+    def sanitize(self, plan: SanitizerPlan, member: MemberLike) -> str:
+        if self.window <= 0:
+            return self.run(plan, [member])[0]
+
+        with self.lock:
+            batch = self.batches.get(plan.fingerprint)
+            leader = batch is None
+
+            if batch is None:
+                batch = self.batches[plan.fingerprint] = PendingBatch(plan)
+
+            index = len(batch.members)
+            batch.members.append(member)
+
+            if len(batch.members) >= self.max_size:
+                del self.batches[plan.fingerprint]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+
+            with self.lock:
+                if self.batches.get(plan.fingerprint) is batch:
+                    del self.batches[plan.fingerprint]
+
+            try:
+                batch.results = self.run(plan, batch.members)
+            except BaseException as error:
+                batch.error = error
+                raise
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+            if batch.error is not None:
+                raise batch.error
+
+        return batch.results[index]
+
+    def run(self, plan: SanitizerPlan, members: list[MemberLike]) -> list[str]:
+        start = time.perf_counter()
+        results = plan.sanitize_batch(members)
+        METRICS.observe_batch(len(members), time.perf_counter() - start)
+        return results
+
+
+COALESCER = Coalescer(COALESCE_MAX_SIZE, COALESCE_WINDOW)
@@ -0,0 +1,158 @@
+from typing import Any, Sequence, TypeVar, overload
+
+import orjson
+from pydantic import BaseModel, ValidationError
+
+from wumpus.sanitizer import Member, MemberLike, SanitizeMemberSchema, SanitizeOptions, SanitizeSchema
+
+MIN_MEMBERS = SanitizeSchema.__fields__["members"].field_info.min_items or 0
+MAX_MEMBERS = SanitizeSchema.__fields__["members"].field_info.max_items or 0
+MAX_ROLES = Member.__fields__["roles"].field_info.max_items or 0
+
+OptionsT = TypeVar("OptionsT", bound=BaseModel)
+
+
+class MemberRecord:
+    """
+    A compact member, holding the same fields as `Member` without the pydantic model overhead.
+    """
+
+    __slots__ = ("id", "username", "nickname", "roles", "force_username")
+
+    def __init__(self, id: str, username: str, nickname: str | None, roles: list[str], force_username: bool) -> None:
+        self.id = id
+        self.username = username
+        self.nickname = nickname
+        self.roles = roles
+        self.force_username = force_username
+
+
+def decode_member(data: Any) -> MemberRecord | None:
+    """
+    Build a record from a decoded member object, or return `None` if `Member` would coerce or reject it.
+    """
+
+    if type(data) is not dict:
+        return None
+
+    id = data.get("id")
+    username = data.get("username")
+    nickname = data.get("nickname")
+    roles = data.get("roles", [])
+    force_username = data.get("force_username", False)
+
+    if type(id) is not str or type(username) is not str or (nickname is not None and type(nickname) is not str):
+        return None
+
+    if type(roles) is not list or len(roles) > MAX_ROLES or any(type(role) is not str for role in roles):
+        return None
+
+    if type(force_username) is not bool:
+        return None
+
+    return MemberRecord(id, username, nickname, roles, force_username)
+
+
+def decode_members(data: Any) -> list[MemberRecord] | None:
+    if type(data) is not list or not MIN_MEMBERS <= len(data) <= MAX_MEMBERS:
+        return None
+
+    records = []
+
+    for item in data:
+        record = decode_member(item)
+        if record is None:
+            return None
+
+        records.append(record)
+
+    return records
+
+
+def decode_options(payload: dict[str, Any], members_key: str, options_model: type[OptionsT]) -> OptionsT | None:
+    try:
+        return options_model(**{key: value for key, value in payload.items() if key != members_key})
+    except ValidationError:
+        return None
+
+
+@overload
+def decode_sanitize_request(payload: Any) -> tuple[SanitizeOptions, Sequence[MemberLike]]:
+    ...
+
+
+@overload
+def decode_sanitize_request(
+    payload: Any, options_model: type[OptionsT], schema_model: type[OptionsT]
+) -> tuple[OptionsT, Sequence[MemberLike]]:
+    ...
+
+
+def decode_sanitize_request(
+    payload: Any, options_model: type[BaseModel] = SanitizeOptions, schema_model: type[BaseModel] = SanitizeSchema
+) -> tuple[BaseModel, Sequence[MemberLike]]:
+    """
+    Validate a decoded `/v1/sanitize` body into its options and members.
+
+    Members that `schema_model` would accept as they are become `MemberRecord`s, and only the options go through
+    pydantic (`options_model`, the schema without `members`). Any other body, valid or not, is validated by
+    `schema_model` itself, so coercion and validation errors are unchanged.
+    """
+
+    if type(payload) is dict:
+        members = decode_members(payload.get("members"))
+
+        if members is not None:
+            options = decode_options(payload, "members", options_model)
+            if options is not None:
+                return options, members
+
+    schema = schema_model(**payload or {})
+    return schema, schema.members  # type: ignore[attr-defined]
+
+
+@overload
+def decode_sanitize_member_request(payload: Any) -> tuple[SanitizeOptions, MemberLike]:
+    ...
+
+
+@overload
+def decode_sanitize_member_request(
+    payload: Any, options_model: type[OptionsT], schema_model: type[OptionsT]
+) -> tuple[OptionsT, MemberLike]:
+    ...
+
+
+def decode_sanitize_member_request(
+    payload: Any, options_model: type[BaseModel] = SanitizeOptions, schema_model: type[BaseModel] = SanitizeMemberSchema
+) -> tuple[BaseModel, MemberLike]:
+    """
+    Validate a decoded `/v1/sanitize/member` body into its options and member, like `decode_sanitize_request`.
+    """
+
+    if type(payload) is dict:
+        member = decode_member(payload.get("member"))
+
+        if member is not None:
+            options = decode_options(payload, "member", options_model)
+            if options is not None:
+                return options, member
+
+    schema = schema_model(**payload or {})
+    return schema, schema.member  # type: ignore[attr-defined]
+
+
+def loads(data: bytes) -> Any:
+    """
+    Decode JSON, raising `ValueError` if it is invalid.
+    """
+
+    return orjson.loads(data)
+
+
+def dumps(body: Any) -> bytes:
+    """
+    Encode a response body as compact UTF-8 JSON, keeping key order.
+    """
+
+    return orjson.dumps(body)
@@ -0,0 +1,138 @@
+import gzip
+import io
+import os
+import zlib
+from typing import IO, cast
+
+import zstandard
+
+MAX_DECOMPRESSED_SIZE = int(os.environ.get("WUMPUS_MAX_DECOMPRESSED_SIZE", 8 * 1024 * 1024))
+COMPRESSION_THRESHOLD = int(os.environ.get("WUMPUS_COMPRESSION_THRESHOLD", 1024))
+# Sanitize responses are mostly IDs and short names: level 1 gets most of the ratio for under half the CPU of 5.
+GZIP_LEVEL = 1
+ZSTD_LEVEL = 3
+# The largest window a zstd content coding may need (RFC 9659), so a frame can't demand a larger buffer.
+ZSTD_MAX_WINDOW_SIZE = 8 * 1024 * 1024
+READ_SIZE = 64 * 1024
+
+# Content codings the server can decode and encode, most preferred first.
+SUPPORTED_ENCODINGS = ("zstd", "gzip")
+
+DECODING_ERRORS = (OSError, EOFError, zlib.error, zstandard.ZstdError)
+
+
+class UnsupportedEncoding(ValueError):
+    pass
+
+
+class DecompressedTooLarge(ValueError):
+    pass
+
+
+class InvalidEncoding(ValueError):
+    pass
+
+
+def open_decoder(stream: IO[bytes], encoding: str) -> IO[bytes]:
+    """
+    Wrap a stream of `Content-Encoding` encoded bytes in a reader that decompresses it as it is read.
+    """
+
+    encoding = encoding.strip().lower() or "identity"
+
+    if encoding == "identity":
+        return stream
+
+    if encoding in ("gzip", "x-gzip"):
+        return cast(IO[bytes], gzip.GzipFile(fileobj=stream, mode="rb"))
+
+    if encoding == "zstd":
+        decompressor = zstandard.ZstdDecompressor(max_window_size=ZSTD_MAX_WINDOW_SIZE)
+        # The zstd reader has no readline, which the stream endpoint needs.
+        reader = decompressor.stream_reader(stream, read_across_frames=True)
+        return io.BufferedReader(cast(io.RawIOBase, reader), READ_SIZE)
+
+    raise UnsupportedEncoding(encoding)
+
+
+def read_decoded(stream: IO[bytes], encoding: str, limit: int = MAX_DECOMPRESSED_SIZE) -> bytes:
+    """
+    Read and decompress a whole encoded body, raising `DecompressedTooLarge` as soon as it decompresses to more than
+    `limit` bytes, so a small compressed body can't expand without bound.
+    """
+
+    reader = open_decoder(stream, encoding)
+    chunks = []
+    size = 0
+
+    try:
+        while chunk := reader.read(min(READ_SIZE, limit + 1 - size)):
+            size += len(chunk)
+
+            if size > limit:
+                raise DecompressedTooLarge(f"Body decompresses to more than {limit} bytes")
+
+            chunks.append(chunk)
+    except DECODING_ERRORS as error:
+        raise InvalidEncoding(str(error)) from error
+
+    return b"".join(chunks)
+
+
+def decode_body(body: bytes, encoding: str, limit: int = MAX_DECOMPRESSED_SIZE) -> bytes:
+    if encoding.strip().lower() in ("", "identity"):
+        return body
+
+    return read_decoded(io.BytesIO(body), encoding, limit)
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """
+    Pick the supported coding with the highest q-value that an `Accept-Encoding` header allows, if any. Ties go to
+    the server's preference (`SUPPORTED_ENCODINGS` order).
+    """
+
+    weights: dict[str, float] = {}
+
+    for item in accept_encoding.lower().split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        weight = 1.0
+
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0
+
+        if coding:
+            weights[coding] = weight
+
+    best: str | None = None
+    best_weight = 0.0
+
+    for coding in SUPPORTED_ENCODINGS:
+        weight = weights.get(coding, weights.get("*", 0))
+
+        if weight > best_weight:
+            best, best_weight = coding, weight
+
+    return best
+
+
+def encode_body(body: bytes, accept_encoding: str, threshold: int = COMPRESSION_THRESHOLD) -> tuple[bytes, str | None]:
+    """
+    Compress a response body with the coding negotiated from `Accept-Encoding`, unless it is smaller than
+    `threshold` bytes. Get the body and its `Content-Encoding`, if any.
+    """
+
+    coding = negotiate(accept_encoding) if len(body) >= threshold and accept_encoding else None
+
+    if coding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body), coding
+
+    if coding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), coding
+
+    return body, None
@@ -0,0 +1,101 @@
+from typing import Iterable
+
+import emoji
+
+
+class EmojiIndex:
+    """
+    Every emoji sequence and all of its prefixes, built once, for greedy longest-match scans from either end of a
+    string. A ZWJ sequence, skin-tone variant, keycap or flag is matched as one emoji rather than per code point.
+    """
+
+    def __init__(self, sequences: Iterable[str]) -> None:
+        self.sequences = frozenset(sequences)
+        self.prefixes = EmojiIndex.all_prefixes(self.sequences)
+        self.reversed_sequences = frozenset(seq[::-1] for seq in self.sequences)
+        self.reversed_prefixes = EmojiIndex.all_prefixes(self.reversed_sequences)
+
+    @staticmethod
+    def all_prefixes(sequences: frozenset[str]) -> frozenset[str]:
+        return frozenset(seq[:i] for seq in sequences for i in range(1, len(seq) + 1))
+
+    def is_emoji(self, text: str) -> bool:
+        return text in self.sequences
+
+    def leading(self, name: str, max_count: int) -> str:
+        """
+        Get up to `max_count` emoji from the start of a name.
+        """
+
+        end = self.scan(name, max_count, self.sequences, self.prefixes)
+        return name[:end]
+
+    def trailing(self, name: str, max_count: int) -> str:
+        """
+        Get up to `max_count` emoji from the end of a name.
+        """
+
+        length = self.scan(name[::-1], max_count, self.reversed_sequences, self.reversed_prefixes)
+        return name[len(name) - length :]
+
+    def split(self, emoji_run: str) -> list[str]:
+        """
+        Split a run of emoji into its emoji, stopping at the first code point that doesn't start one.
+        """
+
+        emojis = []
+        start = 0
+
+        while start < len(emoji_run):
+            length = self.scan(emoji_run[start:], 1, self.sequences, self.prefixes)
+
+            if not length:
+                break
+
+            emojis.append(emoji_run[start : start + length])
+            start += length
+
+        return emojis
+
+    def truncate(self, emoji_run: str, max_length: int) -> str:
+        """
+        Get the longest prefix of a run of emoji that is at most `max_length` code points, without splitting an emoji.
+        """
+
+        end = 0
+
+        for emoji_sequence in self.split(emoji_run):
+            if end + len(emoji_sequence) > max_length:
+                break
+
+            end += len(emoji_sequence)
+
+        return emoji_run[:end]
+
+    @staticmethod
+    def scan(text: str, max_count: int, sequences: frozenset[str], prefixes: frozenset[str]) -> int:
+        """
+        Get the length of the run of up to `max_count` consecutive emoji at the start of `text`.
+        """
+
+        start = 0
+
+        for _ in range(max_count):
+            end = start
+            i = start + 1
+
+            while i <= len(text) and text[start:i] in prefixes:
+                if text[start:i] in sequences:
+                    end = i
+
+                i += 1
+
+            if end == start:
+                break
+
+            start = end
+
+        return start
+
+
+EMOJI_INDEX = EmojiIndex(emoji.EMOJI_DATA)
@@ -0,0 +1,31 @@
+"""
+gunicorn settings for preloading and warming the app in the master, so forked workers start warm and share its pages.
+
+    gunicorn -c python:wumpus.gunicorn_conf -b 0.0.0.0:8080 -k gevent wumpus.main:app
+"""
+
+import gc
+from typing import Any
+
+from gevent import monkey  # type: ignore[import]
+
+# The app is imported in the master, so patch before anything imports ssl or threading.
+monkey.patch_all()
+
+preload_app = True
+raw_env = ["WUMPUS_PRELOAD=1"]
+
+
+def on_starting(server: Any) -> None:
+    from wumpus.warmup import warm_up
+
+    warm_up(server.app.wsgi())
+
+    # Keep the collector from touching (and so copying) the warmed objects in every worker.
+    gc.freeze()
+
+
+def post_fork(server: Any, worker: Any) -> None:
+    from wumpus.main import init_sentry
+
+    init_sentry()
@@ -0,0 +1,70 @@
+import time
+from typing import Any, Sequence
+
+from wumpus.admission import ADMISSION, estimate_cost
+from wumpus.coalesce import COALESCER
+from wumpus.codec import decode_sanitize_member_request, decode_sanitize_request
+from wumpus.metrics import METRICS
+from wumpus.pool import SANITIZER_POOL
+from wumpus.registry import (
+    CONFIG_REGISTRY,
+    RegisteredOptions,
+    RegisteredSanitizeMemberSchema,
+    RegisteredSanitizeSchema,
+)
+from wumpus.sanitizer import MemberLike, SanitizerPlan
+
+
+def sanitize_payload(payload: Any) -> dict[str, Any]:
+    """
+    Validate a decoded `/v1/sanitize` body and build the response body.
+
+    A body with a `config_id` is sanitized with that registered config, and any other body carries its config inline.
+    """
+
+    if type(payload) is dict and "config_id" in payload:
+        registered, members = decode_sanitize_request(payload, RegisteredOptions, RegisteredSanitizeSchema)
+        return sanitize_request(CONFIG_REGISTRY.plan(registered.config_id), members, registered.changed_only)
+
+    options, members = decode_sanitize_request(payload)
+    return sanitize_request(SanitizerPlan.compile(options), members, options.changed_only)
+
+
+def sanitize_member_payload(payload: Any) -> dict[str, Any]:
+    """
+    Validate a decoded `/v1/sanitize/member` body and build the response body, coalescing the member with
+    concurrent requests for the same config.
+    """
+
+    if type(payload) is dict and "config_id" in payload:
+        registered, member = decode_sanitize_member_request(payload, RegisteredOptions, RegisteredSanitizeMemberSchema)
+        plan = CONFIG_REGISTRY.plan(registered.config_id)
+        changed_only = registered.changed_only
+    else:
+        options, member = decode_sanitize_member_request(payload)
+        plan = SanitizerPlan.compile(options)
+        changed_only = options.changed_only
+
+    with ADMISSION.admit(estimate_cost([member])):
+        name = COALESCER.sanitize(plan, member)
+
+    if changed_only:
+        unchanged = name == (member.nickname or member.username)
+        return {"members": {} if unchanged else {member.id: name}, "unchanged": int(unchanged)}
+
+    return {member.id: name}
+
+
+def sanitize_request(plan: SanitizerPlan, members: Sequence[MemberLike], changed_only: bool) -> dict[str, Any]:
+    with ADMISSION.admit(estimate_cost(members)):
+        start = time.perf_counter()
+        body: dict[str, Any]
+
+        if changed_only:
+            changed = SANITIZER_POOL.sanitize(plan, members, changed_only=True)
+            body = {"members": changed, "unchanged": len(members) - len(changed)}
+        else:
+            body = SANITIZER_POOL.sanitize(plan, members)
+
+    METRICS.observe_batch(len(members), time.perf_counter() - start)
+    return body
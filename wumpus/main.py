@@ -1,25 +1,154 @@
+import itertools
 import os
 from typing import Any
 
 import sentry_sdk
-from flask import Flask, request
+from flask import Flask, Response, request, stream_with_context
 from pydantic import ValidationError
 from sentry_sdk.integrations.flask import FlaskIntegration
-from werkzeug.exceptions import HTTPException
+from werkzeug.exceptions import BadRequest, HTTPException, NotFound, RequestEntityTooLarge, UnsupportedMediaType
 
-from wumpus.sanitizer import Sanitizer, SanitizeSchema
+from wumpus.admission import Overloaded
+from wumpus.codec import dumps, loads
+from wumpus.compression import (
+    DecompressedTooLarge,
+    UnsupportedEncoding,
+    encode_body,
+    open_decoder,
+    read_decoded,
+)
+from wumpus.handlers import sanitize_member_payload, sanitize_payload
+from wumpus.metrics import METRICS
+from wumpus.registry import CONFIG_REGISTRY, ConfigNotFound
+from wumpus.sanitizer import SanitizeConfig, SanitizerPlan
+from wumpus.stream import InvalidLineEncoding, LineTooLong, iter_lines, sanitize_lines
 
 SENTRY_DSN = os.environ.get("SENTRY_DSN")
-sentry_sdk.init(SENTRY_DSN, integrations=[FlaskIntegration()])
+PRELOAD = bool(os.environ.get("WUMPUS_PRELOAD"))
+
+
+def init_sentry() -> None:
+    sentry_sdk.init(SENTRY_DSN, integrations=[FlaskIntegration()])
+
+
+# When the gunicorn master preloads the app, each worker initializes Sentry after the fork (see `gunicorn_conf`).
+if not PRELOAD:
+    init_sentry()
+
 
 app = Flask(__name__)
 app.config["JSON_SORT_KEYS"] = False
 
 
+def read_json() -> Any:
+    """
+    Decode a JSON request body, decompressing it first if it has a `Content-Encoding`.
+    """
+
+    if not request.is_json:
+        raise BadRequest()
+
+    encoding = request.headers.get("Content-Encoding", "")
+
+    try:
+        return loads(read_decoded(request.stream, encoding) if encoding else request.get_data())
+    except UnsupportedEncoding:
+        raise UnsupportedMediaType()
+    except DecompressedTooLarge:
+        raise RequestEntityTooLarge()
+    except ValueError:
+        raise BadRequest()
+
+
+def json_response(body: Any) -> Response:
+    """
+    Encode a JSON response body, compressing it if the client accepts a supported coding and it is large enough.
+    """
+
+    data, encoding = encode_body(dumps(body), request.headers.get("Accept-Encoding", ""))
+    response = Response(data, mimetype="application/json")
+    response.vary.add("Accept-Encoding")
+
+    if encoding:
+        response.content_encoding = encoding
+
+    return response
+
+
 @app.post("/v1/sanitize")
-def sanitize() -> dict[str, str]:
-    data = SanitizeSchema(**request.json or {})
-    return Sanitizer.sanitize(data)
+def sanitize() -> Response:
+    return json_response(sanitize_payload(read_json()))
+
+
+@app.post("/v1/sanitize/member")
+def sanitize_member() -> Response:
+    return json_response(sanitize_member_payload(read_json()))
+
+
+@app.post("/v1/sanitize/stream")
+def sanitize_stream() -> Response:
+    try:
+        lines = iter_lines(open_decoder(request.stream, request.headers.get("Content-Encoding", "")))
+        _, config_line = next(lines, (1, b""))
+        config = SanitizeConfig.parse_raw(config_line)
+    except UnsupportedEncoding:
+        raise UnsupportedMediaType()
+    except LineTooLong:
+        raise RequestEntityTooLarge()
+    except InvalidLineEncoding:
+        raise BadRequest()
+
+    plan = SanitizerPlan.compile(config)
+    output = sanitize_lines(plan, lines)
+    # Sanitize the first batch before responding, so a worker over its admission budget can still respond 429.
+    first = next(output, b"")
+    return Response(stream_with_context(itertools.chain([first], output)), mimetype="application/x-ndjson")
+
+
+@app.post("/v1/configs")
+def create_config() -> tuple[dict[str, Any], int]:
+    if not CONFIG_REGISTRY.enabled:
+        raise NotFound()
+
+    config = SanitizeConfig(**request.json or {})
+    config_id, version = CONFIG_REGISTRY.create(config)
+    return {"id": config_id, "version": version, **config.dict()}, 201
+
+
+@app.get("/v1/configs/<config_id>")
+def get_config(config_id: str) -> dict[str, Any]:
+    if not CONFIG_REGISTRY.enabled:
+        raise NotFound()
+
+    config, version = CONFIG_REGISTRY.get(config_id)
+    return {"id": config_id, "version": version, **config.dict()}
+
+
+@app.put("/v1/configs/<config_id>")
+def update_config(config_id: str) -> dict[str, Any]:
+    if not CONFIG_REGISTRY.enabled:
+        raise NotFound()
+
+    config = SanitizeConfig(**request.json or {})
+    version = CONFIG_REGISTRY.update(config_id, config)
+    return {"id": config_id, "version": version, **config.dict()}
+
+
+@app.delete("/v1/configs/<config_id>")
+def delete_config(config_id: str) -> tuple[str, int]:
+    if not CONFIG_REGISTRY.enabled:
+        raise NotFound()
+
+    CONFIG_REGISTRY.delete(config_id)
+    return "", 204
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    if not METRICS.enabled:
+        raise NotFound()
+
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
 
 
 @app.errorhandler(HTTPException)
@@ -27,6 +156,16 @@ def handle_http_exception(error: HTTPException) -> tuple[dict[str, str], int]:
     return {"message": error.name}, error.code or 500
 
 
+@app.errorhandler(ConfigNotFound)
+def handle_config_not_found(error: ConfigNotFound) -> tuple[dict[str, str], int]:
+    return handle_http_exception(NotFound())
+
+
+@app.errorhandler(Overloaded)
+def handle_overloaded(error: Overloaded) -> tuple[dict[str, str], int, dict[str, str]]:
+    return {"message": "Too Many Requests"}, 429, {"Retry-After": str(error.retry_after)}
+
+
 @app.errorhandler(ValidationError)
 def handle_validation_error(error: ValidationError) -> tuple[dict[str, Any], int]:
     return {"message": "Bad Request", "errors": error.errors()}, 400
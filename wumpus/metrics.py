@@ -0,0 +1,217 @@
+import bisect
+import glob
+import json
+import os
+import time
+from typing import Any, Callable
+
+from wumpus.cache import RESULT_CACHE
+
+METRICS_DIR = os.environ.get("WUMPUS_METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.environ.get("WUMPUS_METRICS_FLUSH_INTERVAL", 1))
+
+STAGE_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 1e-2)
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+BATCH_SECONDS_BUCKETS = (1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+HISTOGRAMS: dict[str, tuple[str, tuple[float, ...]]] = {
+    "wumpus_stage_seconds": ("Time spent in each sanitization stage per name.", STAGE_BUCKETS),
+    "wumpus_batch_size": ("Members per sanitize request.", BATCH_SIZE_BUCKETS),
+    "wumpus_batch_seconds": ("Time spent sanitizing each request.", BATCH_SECONDS_BUCKETS),
+}
+
+COUNTERS: dict[str, str] = {
+    "wumpus_members_total": "Members sanitized.",
+    "wumpus_ascii_fast_path_total": "Names sanitized on the ASCII fast path.",
+    "wumpus_dedup_names_total": "Members sanitized in batches, excluding excluded members.",
+    "wumpus_dedup_unique_names_total": "Distinct names sanitized in batches after deduplication.",
+    "wumpus_admission_queued_total": "Requests that waited for admission.",
+    "wumpus_admission_rejected_total": "Requests rejected by admission control with 429.",
+    "wumpus_result_cache_hits_total": "Result cache lookups that returned a sanitized name.",
+    "wumpus_result_cache_misses_total": "Result cache lookups that missed or had expired.",
+    "wumpus_result_cache_shared_hits_total": "Results found in the shared result cache after a local miss.",
+}
+
+Lap = Callable[[str], None]
+
+
+def skip_lap(stage: str) -> None:
+    pass
+
+
+class Stopwatch:
+    """
+    Record the time since the previous lap (or since creation) as the duration of `stage`.
+    """
+
+    __slots__ = ("metrics", "last")
+
+    def __init__(self, metrics: "Metrics") -> None:
+        self.metrics = metrics
+        self.last = time.perf_counter()
+
+    def __call__(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.metrics.observe("wumpus_stage_seconds", now - self.last, f'stage="{stage}"')
+        self.last = now
+
+
+class Metrics:
+    """
+    Opt-in per-process counters and histograms, exported in the Prometheus text format.
+
+    Each process periodically writes a snapshot to `directory`, and `render` merges the snapshots of every process
+    sharing it, so `/metrics` reports totals across gunicorn workers and pool processes. With no directory, nothing
+    is recorded and `stopwatch` returns a no-op.
+    """
+
+    def __init__(self, directory: str, flush_interval: float) -> None:
+        self.directory = directory
+        self.enabled = bool(directory)
+        self.flush_interval = flush_interval
+        self.last_flush = 0.0
+        self.counters: dict[str, dict[str, float]] = {}
+        self.histograms: dict[str, dict[str, list[float]]] = {}
+
+        if self.enabled:
+            os.makedirs(directory, exist_ok=True)
+
+    def stopwatch(self) -> Lap:
+        if not self.enabled:
+            return skip_lap
+
+        return Stopwatch(self)
+
+    def inc(self, name: str, value: float = 1, labels: str = "") -> None:
+        if not self.enabled:
+            return
+
+        series = self.counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name: str, value: float, labels: str = "") -> None:
+        """
+        Add a value to a histogram, stored as per-bucket counts (the last bucket is +Inf) followed by the sum.
+        """
+
+        if not self.enabled:
+            return
+
+        buckets = HISTOGRAMS[name][1]
+        series = self.histograms.setdefault(name, {})
+        counts = series.get(labels)
+
+        if counts is None:
+            counts = series[labels] = [0] * (len(buckets) + 2)
+
+        counts[bisect.bisect_left(buckets, value)] += 1
+        counts[-1] += value
+
+    def observe_batch(self, size: int, seconds: float) -> None:
+        if not self.enabled:
+            return
+
+        self.inc("wumpus_members_total", size)
+        self.observe("wumpus_batch_size", size)
+        self.observe("wumpus_batch_seconds", seconds)
+        self.maybe_flush()
+
+    def reset(self) -> None:
+        """
+        Forget everything recorded by this process, including its last snapshot.
+        """
+
+        self.counters.clear()
+        self.histograms.clear()
+
+        if self.enabled:
+            try:
+                os.remove(self.snapshot_path())
+            except FileNotFoundError:
+                pass
+
+    def snapshot(self) -> dict[str, Any]:
+        counters = {name: dict(series) for name, series in self.counters.items()}
+        counters["wumpus_result_cache_hits_total"] = {"": RESULT_CACHE.hits}
+        counters["wumpus_result_cache_misses_total"] = {"": RESULT_CACHE.misses}
+        counters["wumpus_result_cache_shared_hits_total"] = {"": RESULT_CACHE.shared_hits}
+        return {"counters": counters, "histograms": self.histograms}
+
+    def maybe_flush(self) -> None:
+        if self.enabled and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, f"{os.getpid()}.json")
+
+    def flush(self) -> None:
+        path = self.snapshot_path()
+        temp_path = f"{path}.tmp"
+
+        with open(temp_path, "w") as file:
+            json.dump(self.snapshot(), file)
+
+        os.replace(temp_path, path)
+        self.last_flush = time.monotonic()
+
+    def collect(self) -> dict[str, Any]:
+        """
+        Merge the snapshots of every process writing to the metrics directory.
+        """
+
+        self.flush()
+
+        counters: dict[str, dict[str, float]] = {}
+        histograms: dict[str, dict[str, list[float]]] = {}
+
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                with open(path) as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError):
+                continue
+
+            for name, series in snapshot["counters"].items():
+                merged_counter = counters.setdefault(name, {})
+                for labels, value in series.items():
+                    merged_counter[labels] = merged_counter.get(labels, 0) + value
+
+            for name, series in snapshot["histograms"].items():
+                merged_histogram = histograms.setdefault(name, {})
+                for labels, counts in series.items():
+                    merged = merged_histogram.setdefault(labels, [0] * len(counts))
+                    merged_histogram[labels] = [a + b for a, b in zip(merged, counts)]
+
+        return {"counters": counters, "histograms": histograms}
+
+    def render(self) -> str:
+        collected = self.collect()
+        lines = []
+
+        for name, help_text in COUNTERS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+
+            for labels, value in sorted(collected["counters"].get(name, {}).items()):
+                lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+
+        for name, (help_text, buckets) in HISTOGRAMS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+
+            for labels, counts in sorted(collected["histograms"].get(name, {}).items()):
+                prefix = f"{labels}," if labels else ""
+                cumulative = 0
+
+                for bound, count in zip([*map(str, buckets), "+Inf"], counts):
+                    cumulative += int(count)
+                    lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+
+                suffix = f"{{{labels}}}" if labels else ""
+                lines.append(f"{name}_sum{suffix} {counts[-1]}")
+                lines.append(f"{name}_count{suffix} {cumulative}")
+
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics(METRICS_DIR, METRICS_FLUSH_INTERVAL)
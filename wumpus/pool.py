@@ -0,0 +1,65 @@
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Sequence
+
+from wumpus.metrics import METRICS
+from wumpus.sanitizer import MemberLike, SanitizeConfig, SanitizerPlan
+
+POOL_WORKERS = int(os.environ.get("WUMPUS_POOL_WORKERS", 0))
+POOL_CHUNK_SIZE = int(os.environ.get("WUMPUS_POOL_CHUNK_SIZE", 250))
+
+
+def sanitize_chunk(config: SanitizeConfig, members: Sequence[MemberLike], changed_only: bool) -> dict[str, str]:
+    results = sanitize_with_plan(SanitizerPlan.compile(config), members, changed_only)
+    METRICS.maybe_flush()
+    return results
+
+
+def sanitize_with_plan(plan: SanitizerPlan, members: Sequence[MemberLike], changed_only: bool) -> dict[str, str]:
+    return plan.sanitize_changed(members) if changed_only else plan.sanitize(members)
+
+
+class SanitizerPool:
+    """
+    Persistent process pool that sanitizes large batches in chunks across cores, keeping member order.
+
+    Batches of at most `chunk_size` members are sanitized inline, as is every batch when `workers` is 0.
+    The executor is started on first use, so each forked gunicorn worker gets its own pool.
+    """
+
+    def __init__(self, workers: int, chunk_size: int) -> None:
+        self.workers = workers
+        self.chunk_size = max(chunk_size, 1)
+        self.executor: ProcessPoolExecutor | None = None
+
+    def sanitize(
+        self, plan: SanitizerPlan, members: Sequence[MemberLike], changed_only: bool = False
+    ) -> dict[str, str]:
+        if not self.workers or len(members) <= self.chunk_size:
+            return sanitize_with_plan(plan, members, changed_only)
+
+        if self.executor is None:
+            # Spawned children don't inherit the gevent hub or Sentry client of the gunicorn worker.
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+        chunks = [members[i : i + self.chunk_size] for i in range(0, len(members), self.chunk_size)]
+
+        results: dict[str, str] = {}
+        chunk_results = self.executor.map(
+            sanitize_chunk, itertools.repeat(plan.config), chunks, itertools.repeat(changed_only)
+        )
+
+        for result in chunk_results:
+            results.update(result)
+
+        return results
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+SANITIZER_POOL = SanitizerPool(POOL_WORKERS, POOL_CHUNK_SIZE)
@@ -0,0 +1,147 @@
+import os
+import secrets
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from pydantic import BaseModel, Field
+
+from wumpus.sanitizer import PLAN_CACHE_SIZE, Member, SanitizeConfig, SanitizerPlan
+
+CONFIG_DB = os.environ.get("WUMPUS_CONFIG_DB", "")
+
+
+class ConfigNotFound(KeyError):
+    pass
+
+
+class RegisteredOptions(BaseModel):
+    config_id: str = Field(min_length=1, max_length=64)
+    changed_only: bool = False
+
+
+class RegisteredSanitizeSchema(RegisteredOptions):
+    members: list[Member] = Field(min_items=1, max_items=1000)
+
+
+class RegisteredSanitizeMemberSchema(RegisteredOptions):
+    member: Member
+
+
+class ConfigRegistry:
+    """
+    Sanitize configs stored server-side in SQLite, so requests can reference one by ID instead of resending it.
+
+    Every update bumps the config's version. Each process keeps compiled plans by ID and recompiles a plan when
+    the stored version no longer matches, so all gunicorn workers sharing the database see updates immediately.
+    With no database path, the registry is disabled.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection: sqlite3.Connection | None = None
+        self.connection_key: tuple[str, int] | None = None
+        self.plans: OrderedDict[str, tuple[int, SanitizerPlan]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Get this process's connection, opening it on first use (connections must not be shared across a fork).
+        """
+
+        key = (self.path, os.getpid())
+
+        if self.connection is None or self.connection_key != key:
+            connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS configs "
+                "(id TEXT PRIMARY KEY, version INTEGER NOT NULL, config TEXT NOT NULL)"
+            )
+            self.connection = connection
+            self.connection_key = key
+            self.plans.clear()
+
+        return self.connection
+
+    def create(self, config: SanitizeConfig) -> tuple[str, int]:
+        config_id = secrets.token_urlsafe(16)
+
+        with self.lock:
+            self.connect().execute(
+                "INSERT INTO configs (id, version, config) VALUES (?, 1, ?)", (config_id, config.json())
+            )
+
+        return config_id, 1
+
+    def update(self, config_id: str, config: SanitizeConfig) -> int:
+        with self.lock:
+            row = (
+                self.connect()
+                .execute(
+                    "UPDATE configs SET version = version + 1, config = ? WHERE id = ? RETURNING version",
+                    (config.json(), config_id),
+                )
+                .fetchone()
+            )
+
+        if row is None:
+            raise ConfigNotFound(config_id)
+
+        return int(row[0])
+
+    def get(self, config_id: str) -> tuple[SanitizeConfig, int]:
+        with self.lock:
+            row = self.connect().execute("SELECT config, version FROM configs WHERE id = ?", (config_id,)).fetchone()
+
+        if row is None:
+            raise ConfigNotFound(config_id)
+
+        return SanitizeConfig.parse_raw(row[0]), int(row[1])
+
+    def delete(self, config_id: str) -> None:
+        with self.lock:
+            cursor = self.connect().execute("DELETE FROM configs WHERE id = ?", (config_id,))
+
+        if not cursor.rowcount:
+            raise ConfigNotFound(config_id)
+
+    def plan(self, config_id: str) -> SanitizerPlan:
+        """
+        Get the compiled plan for a stored config, reusing this process's plan while its version is current.
+        """
+
+        if not self.enabled:
+            raise ConfigNotFound(config_id)
+
+        with self.lock:
+            row = self.connect().execute("SELECT version FROM configs WHERE id = ?", (config_id,)).fetchone()
+
+            if row is None:
+                self.plans.pop(config_id, None)
+                raise ConfigNotFound(config_id)
+
+            cached = self.plans.get(config_id)
+
+            if cached is not None and cached[0] == row[0]:
+                self.plans.move_to_end(config_id)
+                return cached[1]
+
+        config, version = self.get(config_id)
+        plan = SanitizerPlan.compile(config)
+
+        with self.lock:
+            self.plans[config_id] = (version, plan)
+            self.plans.move_to_end(config_id)
+
+            if len(self.plans) > PLAN_CACHE_SIZE:
+                self.plans.popitem(last=False)
+
+        return plan
+
+
+CONFIG_REGISTRY = ConfigRegistry(CONFIG_DB)
@@ -1,14 +1,27 @@
+import bisect
+import functools
+import hashlib
+import json
 import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Protocol, Sequence
 
-import emoji
 from pydantic import BaseModel, Field
-from unidecode import unidecode
+
+from wumpus.cache import RESULT_CACHE
+from wumpus.emoji_index import EMOJI_INDEX
+from wumpus.metrics import METRICS, Lap
+from wumpus.transliteration import TransliterationTable
 
 C = "©"
 R = "®"
 TM = "™"
 HEART = "<3"
 
+PLAN_CACHE_SIZE = 256
+MAX_NAME_LENGTH = 32
+
 REGIONAL_INDICATORS_TO_ASCII = {
     "🇦": "A",
     "🇧": "B",
@@ -44,9 +57,41 @@ REGIONAL_INDICATORS_TO_ASCII = {
 
 STRICT_REGEX = re.compile(r"[^\w &'.-]", re.ASCII)
 STRICT_SPECIAL_CHARS = {" ", "_", ".", "-", "&", "'"}
+STRICT_STRIP_CHARS = "".join(STRICT_SPECIAL_CHARS)
 
 BRACKETS_REGEX = re.compile(r"(\(|\[|\{)(\w)(\)|\]|\})")
 BRACKETS_MAPPING = {")": "(", "]": "[", "}": "{"}
+BRACKETS_OPEN = frozenset(BRACKETS_MAPPING.values())
+NESTED_BRACKETS_REGEX = re.compile(r"[(\[{]" + BRACKETS_REGEX.pattern + r"[)\]}]")
+
+
+@functools.cache
+def emoji_table(normalize_regional: bool) -> dict[int, str]:
+    """
+    Get the `str.translate` table applied before emoji extraction: regional indicators become letters (if enabled)
+    and the ©, ®, and ™ signs are removed.
+    """
+
+    table = dict.fromkeys(map(ord, C + R + TM), "")
+
+    if normalize_regional:
+        table.update({ord(char): ascii for char, ascii in REGIONAL_INDICATORS_TO_ASCII.items()})
+
+    return table
+
+
+@functools.cache
+def transliteration_table(normalize_regional: bool) -> TransliterationTable:
+    return TransliterationTable(emoji_table(normalize_regional))
+
+
+@functools.cache
+def consecutive_regex(max_consecutive: int) -> re.Pattern[str]:
+    """
+    Match runs of more than `max_consecutive` of the same character.
+    """
+
+    return re.compile(r"(.)\1{%d,}" % max_consecutive, re.DOTALL)
 
 
 class Member(BaseModel):
@@ -57,7 +102,7 @@ class Member(BaseModel):
     force_username: bool = False
 
 
-class SanitizeSchema(BaseModel):
+class SanitizeConfig(BaseModel):
     dehoist: bool = True
     exclude_roles: list[str] = Field(default_factory=list, max_items=250)
     exclude_users: list[str] = Field(default_factory=list, max_items=1000)
@@ -69,7 +114,6 @@ class SanitizeSchema(BaseModel):
     max_emoji_leading: int = Field(default=0, ge=0, le=32)
     max_emoji_trailing: int = Field(default=0, ge=0, le=32)
     max_spaces: int = Field(default=0, ge=0, le=32)
-    members: list[Member] = Field(min_items=1, max_items=1000)
     normalize_brackets: bool = True
     normalize_regional: bool = True
     replace_char: str = Field(default="", max_length=1)
@@ -80,138 +124,353 @@ class SanitizeSchema(BaseModel):
     trailing_trademark: bool = False
 
 
-class Sanitizer:
+class SanitizeOptions(SanitizeConfig):
+    changed_only: bool = False
+
+
+class SanitizeSchema(SanitizeOptions):
+    members: list[Member] = Field(min_items=1, max_items=1000)
+
+
+class SanitizeMemberSchema(SanitizeOptions):
+    member: Member
+
+
+class MemberLike(Protocol):
+    """
+    The member fields read while sanitizing, provided by both `Member` and the compact `wumpus.codec.MemberRecord`.
+    """
+
+    id: str
+    username: str
+    nickname: str | None
+    roles: list[str]
+    force_username: bool
+
+
+Stage = Callable[[str], str]
+
+
+class SanitizerPlan:
+    """
+    A `SanitizeConfig` compiled into exclusion sets and an ordered list of the enabled stages.
+
+    Plans are cached by config fingerprint, so repeated requests with the same config share one plan.
+    """
+
+    cache: OrderedDict[str, "SanitizerPlan"] = OrderedDict()
+    cache_lock = threading.Lock()
+
+    def __init__(self, config: SanitizeConfig, fingerprint: str) -> None:
+        self.config = SanitizeConfig.construct(**config.dict(include=set(SanitizeConfig.__fields__)))
+        self.fingerprint = fingerprint
+        self.exclude_roles = frozenset(config.exclude_roles)
+        self.exclude_users = frozenset(config.exclude_users)
+        self.fallback_name = config.fallback_name
+        self.force_username = config.force_username
+        self.max_emoji_leading = config.max_emoji_leading
+        self.max_emoji_trailing = config.max_emoji_trailing
+        self.emoji_table = emoji_table(config.normalize_regional)
+        self.transliteration_table = transliteration_table(config.normalize_regional)
+        self.replace_char = config.replace_char
+        self.trailing_heart = config.trailing_heart
+        self.trailing_trademark = config.trailing_trademark
+        self.stages = SanitizerPlan.compile_stages(config)
+
     @staticmethod
-    def sanitize(schema: SanitizeSchema) -> dict[str, str]:
-        return {member.id: Sanitizer.sanitize_member(member, schema) for member in schema.members}
+    def compile(config: SanitizeConfig) -> "SanitizerPlan":
+        """
+        Get the plan for a config, compiling it if no plan with the same fingerprint is cached.
+        """
+
+        fingerprint = SanitizerPlan.fingerprint_config(config)
+
+        with SanitizerPlan.cache_lock:
+            plan = SanitizerPlan.cache.get(fingerprint)
+
+            if plan is not None:
+                SanitizerPlan.cache.move_to_end(fingerprint)
+                return plan
+
+        plan = SanitizerPlan(config, fingerprint)
+
+        with SanitizerPlan.cache_lock:
+            SanitizerPlan.cache[fingerprint] = plan
+
+            if len(SanitizerPlan.cache) > PLAN_CACHE_SIZE:
+                SanitizerPlan.cache.popitem(last=False)
+
+        return plan
 
     @staticmethod
-    def sanitize_member(member: Member, schema: SanitizeSchema) -> str:
-        name = member.nickname or member.username
+    def fingerprint_config(config: SanitizeConfig) -> str:
+        """
+        Hash the config fields of a config or schema. Exclusion order and duplicates do not affect the fingerprint.
+        """
+
+        data = config.dict(include=set(SanitizeConfig.__fields__))
+        data["exclude_roles"] = sorted(set(data["exclude_roles"]))
+        data["exclude_users"] = sorted(set(data["exclude_users"]))
+
+        encoded = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+    @staticmethod
+    def compile_stages(config: SanitizeConfig) -> list[tuple[str, Stage]]:
+        """
+        Build the enabled post-transliteration stages, by name, in the order they are applied.
+        """
+
+        stages: list[tuple[str, Stage]] = []
+
+        if config.normalize_brackets:
+            stages.append(("normalize_brackets", Sanitizer.normalize_brackets))
+
+        if config.dehoist:
+            stages.append(("dehoist", Sanitizer.dehoist))
+
+        if config.max_spaces:
+            stages.append(("replace_spaces", functools.partial(Sanitizer.replace_spaces, max_spaces=config.max_spaces)))
+
+        if config.max_char_spacing:
+            stages.append(
+                (
+                    "replace_char_spacing",
+                    functools.partial(Sanitizer.replace_char_spacing, max_char_spacing=config.max_char_spacing),
+                )
+            )
 
-        if member.id in schema.exclude_users:
-            return name
+        if config.max_consecutive:
+            stages.append(
+                (
+                    "replace_consecutive",
+                    functools.partial(Sanitizer.replace_consecutive, max_consecutive=config.max_consecutive),
+                )
+            )
 
-        if any(role in member.roles for role in schema.exclude_roles):
-            return name
+        if config.max_consecutive_upper:
+            stages.append(
+                (
+                    "replace_consecutive_upper",
+                    functools.partial(
+                        Sanitizer.replace_consecutive_upper, max_consecutive_upper=config.max_consecutive_upper
+                    ),
+                )
+            )
 
-        if schema.force_username or member.force_username or schema.fallback_name == name:
+        if config.strip_pipes_leading:
+            stages.append(("strip_pipes_leading", lambda name: name.lstrip("|")))
+
+        if config.strip_pipes_trailing:
+            stages.append(("strip_pipes_trailing", lambda name: name.rstrip("|")))
+
+        if config.normalize_brackets:
+            stages.append(("strip_dangling_brackets", Sanitizer.strip_dangling_brackets))
+
+        if config.strict:
+            stages.append(("strict", lambda name: re.sub(STRICT_REGEX, "", name).strip(STRICT_STRIP_CHARS)))
+
+        return stages
+
+    def is_excluded(self, member: MemberLike) -> bool:
+        return member.id in self.exclude_users or not self.exclude_roles.isdisjoint(member.roles)
+
+    def select_name(self, member: MemberLike) -> str:
+        """
+        Get the name that will be sanitized for a member that is not excluded.
+        """
+
+        name = member.nickname or member.username
+
+        if self.force_username or member.force_username or self.fallback_name == name:
             name = member.username
 
-        if schema.normalize_regional:
-            name = "".join(REGIONAL_INDICATORS_TO_ASCII.get(c, c) for c in name)
+        return name
 
-        trailing_trademark = ""
-        if schema.trailing_trademark:
-            trailing_trademark = R if name.endswith(R) else TM if name.endswith(TM) else ""
+    def sanitize(self, members: Sequence[MemberLike]) -> dict[str, str]:
+        return dict(zip([member.id for member in members], self.sanitize_batch(members)))
 
-        name = name.replace(C, "").replace(R, "").replace(TM, "")
+    def sanitize_changed(self, members: Sequence[MemberLike]) -> dict[str, str]:
+        """
+        Sanitize members, keeping only those whose sanitized name differs from their current display name.
+        """
 
-        leading_emoji = ""
-        trailing_emoji = ""
+        changed = {}
 
-        if schema.max_emoji_leading:
-            leading_emoji = Sanitizer.get_leading_emoji(name, schema.max_emoji_leading)
+        for member, name in zip(members, self.sanitize_batch(members)):
+            if name != (member.nickname or member.username):
+                changed[member.id] = name
 
-        if schema.max_emoji_trailing:
-            trailing_emoji = Sanitizer.get_trailing_emoji(name, schema.max_emoji_trailing)
+        return changed
 
-        name = unidecode(name, errors="replace", replace_str=schema.replace_char)
-        name = " ".join(name.split())
+    def sanitize_batch(self, members: Sequence[MemberLike]) -> list[str]:
+        """
+        Get each member's sanitized name in order, sanitizing each distinct selected name in the batch only once.
 
-        trailing_heart = name.endswith(HEART)
-        if schema.trailing_heart:
-            name = name.replace(HEART, "")
+        With a shared result cache, the results for the whole batch are loaded in one round trip and new results
+        are written back in one.
+        """
+
+        selected = [None if self.is_excluded(member) else self.select_name(member) for member in members]
+        unique = dict.fromkeys(name for name in selected if name is not None)
 
-        if schema.normalize_brackets:
-            name = Sanitizer.normalize_brackets(name)
+        if RESULT_CACHE.shared is not None:
+            RESULT_CACHE.prefetch((name, self.fingerprint) for name in unique)
 
-        if schema.dehoist:
-            name = Sanitizer.dehoist(name)
+        sanitized = {name: self.sanitize_name(name) for name in unique}
+        RESULT_CACHE.flush()
 
-        if schema.max_spaces:
-            name = Sanitizer.replace_spaces(name, schema.max_spaces)
+        METRICS.inc("wumpus_dedup_names_total", len(selected) - selected.count(None))
+        METRICS.inc("wumpus_dedup_unique_names_total", len(sanitized))
 
-        if schema.max_char_spacing:
-            name = Sanitizer.replace_char_spacing(name, schema.max_char_spacing)
+        return [
+            member.nickname or member.username if name is None else sanitized[name]
+            for member, name in zip(members, selected)
+        ]
 
-        if schema.max_consecutive:
-            name = Sanitizer.replace_consecutive(name, schema.max_consecutive)
+    def sanitize_member(self, member: MemberLike) -> str:
+        if self.is_excluded(member):
+            return member.nickname or member.username
 
-        if schema.max_consecutive_upper:
-            name = Sanitizer.replace_consecutive_upper(name, schema.max_consecutive_upper)
+        return self.sanitize_name(self.select_name(member))
 
-        if schema.strip_pipes_leading:
-            name = name.lstrip("|")
+    def sanitize_name(self, name: str) -> str:
+        """
+        Sanitize a selected name, reusing the cached result for the same name and config if there is one.
+        """
 
-        if schema.strip_pipes_trailing:
-            name = name.rstrip("|")
+        key = (name, self.fingerprint)
+        sanitized = RESULT_CACHE.get(key)
 
-        if schema.normalize_brackets:
-            name = Sanitizer.strip_dangling_brackets(name)
+        if sanitized is None:
+            sanitized = self.transform_name(name)
+            RESULT_CACHE.set(key, sanitized)
 
-        if schema.strict:
-            name = re.sub(STRICT_REGEX, "", name).strip("".join(STRICT_SPECIAL_CHARS))
+        return sanitized
 
-        if trailing_trademark:
-            name = f"{name}{trailing_trademark}"
+    def transform_name(self, name: str) -> str:
+        lap = METRICS.stopwatch()
 
-        if leading_emoji:
-            name = f"{leading_emoji} {name}"
+        # CPython records whether a string is pure ASCII, so this is a flag check rather than a scan. ASCII names
+        # contain no regional indicators, trademark signs, or emoji, and transliteration leaves them unchanged.
+        ascii_only = name.isascii()
 
-        if trailing_emoji:
-            name = f"{name} {trailing_emoji}"
+        if ascii_only:
+            trailing_trademark = leading_emoji = trailing_emoji = ""
+            name = " ".join(name.split())
+            METRICS.inc("wumpus_ascii_fast_path_total")
+            lap("ascii")
+        else:
+            name, trailing_trademark, leading_emoji, trailing_emoji = self.transliterate(name, lap)
 
-        if schema.trailing_heart and trailing_heart:
-            name = f"{name} {HEART}"
+        trailing_heart = name.endswith(HEART)
+        if self.trailing_heart:
+            name = name.replace(HEART, "")
 
-        name = " ".join(name.split())[:32]
+        for stage_name, stage in self.stages:
+            name = stage(name)
+            lap(stage_name)
 
-        if all(emoji.is_emoji(char) for char in name.split()):
-            name = schema.fallback_name
+        heart = HEART if self.trailing_heart and trailing_heart else ""
 
-        if not name:
-            name = schema.fallback_name
+        if not any(len(sequence) > 1 for run in (leading_emoji, trailing_emoji) for sequence in EMOJI_INDEX.split(run)):
+            # Single code point emoji can't be split, so everything is kept up to the length limit.
+            name = f"{leading_emoji} {name}{trailing_trademark} {trailing_emoji} {heart}"
+            name = " ".join(name.split())[:MAX_NAME_LENGTH]
+        else:
+            name = self.fit_emoji(f"{name}{trailing_trademark}", leading_emoji, trailing_emoji, heart)
 
+        if not name or (not ascii_only and all(EMOJI_INDEX.is_emoji(word) for word in name.split())):
+            name = self.fallback_name
+
+        lap("finalize")
         return name
 
     @staticmethod
-    def get_leading_emoji(name: str, max_leading_emoji: int) -> str:
+    def fit_emoji(name: str, leading_emoji: str, trailing_emoji: str, heart: str) -> str:
         """
-        Get the leading emoji from a name.
+        Add emoji back around a name when some are multi-code-point sequences, which a plain length limit could split
+        or let push the name out. The name gets priority, then leading emoji, trailing emoji and the heart are added
+        while they fit, keeping each emoji whole.
         """
 
-        leading_emojis = []
+        name = " ".join(name.split())[:MAX_NAME_LENGTH]
+        room = MAX_NAME_LENGTH - len(name)
 
-        for char in name:
-            if emoji.is_emoji(char):
-                leading_emojis.append(char)
-            else:
-                break
+        if leading_emoji := EMOJI_INDEX.truncate(leading_emoji, room - 1):
+            name = f"{leading_emoji} {name}"
+            room -= len(leading_emoji) + 1
 
-        if len(leading_emojis) > max_leading_emoji:
-            leading_emojis = leading_emojis[:max_leading_emoji]
+        if trailing_emoji := EMOJI_INDEX.truncate(trailing_emoji, room - 1):
+            name = f"{name} {trailing_emoji}"
+            room -= len(trailing_emoji) + 1
 
-        return "".join(leading_emojis)
+        if heart and room > len(heart):
+            name = f"{name} {heart}"
 
-    @staticmethod
-    def get_trailing_emoji(name: str, max_trailing_emoji: int) -> str:
+        return " ".join(name.split())
+
+    def transliterate(self, name: str, lap: Lap) -> tuple[str, str, str, str]:
         """
-        Get the trailing emoji from a name.
+        Run the Unicode stages on a non-ASCII name.
+
+        Returns the transliterated name with collapsed whitespace, plus the trailing trademark sign and the leading
+        and trailing emoji to add back after the other stages.
         """
 
-        trailing_emojis = []
+        trailing_trademark = ""
+        if self.trailing_trademark:
+            trailing_trademark = R if name.endswith(R) else TM if name.endswith(TM) else ""
+
+        leading_emoji = ""
+        trailing_emoji = ""
 
-        for char in reversed(name):
-            if emoji.is_emoji(char):
-                trailing_emojis.append(char)
-            else:
-                break
+        if self.max_emoji_leading or self.max_emoji_trailing:
+            emoji_name = name.translate(self.emoji_table)
+
+            if self.max_emoji_leading:
+                leading_emoji = Sanitizer.get_leading_emoji(emoji_name, self.max_emoji_leading)
 
-        if len(trailing_emojis) > max_trailing_emoji:
-            trailing_emojis = trailing_emojis[:max_trailing_emoji]
+            if self.max_emoji_trailing:
+                trailing_emoji = Sanitizer.get_trailing_emoji(emoji_name, self.max_emoji_trailing)
 
-        return "".join(reversed(trailing_emojis))
+            lap("emoji")
+
+        name = self.transliteration_table.transliterate(name, self.replace_char)
+        name = " ".join(name.split())
+        lap("transliterate")
+
+        return name, trailing_trademark, leading_emoji, trailing_emoji
+
+
+class Sanitizer:
+    @staticmethod
+    def sanitize(schema: SanitizeSchema) -> dict[str, str]:
+        return SanitizerPlan.compile(schema).sanitize(schema.members)
+
+    @staticmethod
+    def sanitize_changed(schema: SanitizeSchema) -> dict[str, str]:
+        return SanitizerPlan.compile(schema).sanitize_changed(schema.members)
+
+    @staticmethod
+    def sanitize_member(member: Member, schema: SanitizeSchema) -> str:
+        return SanitizerPlan.compile(schema).sanitize_member(member)
+
+    @staticmethod
+    def get_leading_emoji(name: str, max_leading_emoji: int) -> str:
+        """
+        Get up to `max_leading_emoji` leading emoji from a name, keeping multi-codepoint emoji whole.
+        """
+
+        return EMOJI_INDEX.leading(name, max_leading_emoji)
+
+    @staticmethod
+    def get_trailing_emoji(name: str, max_trailing_emoji: int) -> str:
+        """
+        Get up to `max_trailing_emoji` trailing emoji from a name, keeping multi-codepoint emoji whole.
+        """
+
+        return EMOJI_INDEX.trailing(name, max_trailing_emoji)
 
     @staticmethod
     def replace_spaces(name: str, max_spaces: int) -> str:
@@ -244,22 +503,7 @@ class Sanitizer:
         Collapse any consecutive characters into a single character.
         """
 
-        consecutive = 0
-        last_char = None
-        new_name = ""
-
-        for char in name:
-            if char == last_char:
-                consecutive += 1
-            else:
-                consecutive = 1
-
-            if consecutive <= max_consecutive:
-                new_name += char
-
-            last_char = char
-
-        return new_name
+        return consecutive_regex(max_consecutive).sub(lambda match: match.group()[:max_consecutive], name)
 
     @staticmethod
     def replace_consecutive_upper(name: str, max_consecutive_upper: int) -> str:
@@ -268,7 +512,6 @@ class Sanitizer:
         """
 
         consecutive = 0
-        new_name = ""
 
         for char in name:
             if char.isupper():
@@ -277,12 +520,9 @@ class Sanitizer:
                 consecutive = 0
 
             if consecutive >= max_consecutive_upper:
-                new_name = name.lower()
-                break
-            else:
-                new_name += char
+                return name.lower()
 
-        return new_name
+        return name
 
     @staticmethod
     def dehoist(name: str) -> str:
@@ -290,13 +530,11 @@ class Sanitizer:
         Dehoist a name by stripping any leading non-alphanumeric characters.
         """
 
-        for char in name:
+        for index, char in enumerate(name):
             if char.isalnum():
-                break
-            else:
-                name = name[1:]
+                return name[index:]
 
-        return name
+        return ""
 
     @staticmethod
     def normalize_brackets(name: str) -> str:
@@ -304,11 +542,38 @@ class Sanitizer:
         Remove parentheses (), square brackets [], or curly brackets {} around single characters.
         """
 
-        matches = re.findall(BRACKETS_REGEX, name)
-        for match in matches:
-            name = name.replace("".join(match), match[1])
+        if not NESTED_BRACKETS_REGEX.search(name):
+            return BRACKETS_REGEX.sub(r"\2", name)
 
-        return name
+        # Nested names used to be rewritten with one `str.replace` per match, in match order, and that cascade is
+        # part of the output: replacing "(a)" in "((a))" creates a new "(a)" that only a later replacement of the
+        # same text removes. Each replacement peels at most one pair of brackets off every character it matches,
+        # and no bracket can be peeled off two characters. So a character loses its next pair of brackets at the
+        # first later match of exactly that text, which is looked up instead of replaying every replacement.
+        matches: dict[str, list[int]] = {}
+        for index, match in enumerate(BRACKETS_REGEX.findall(name)):
+            matches.setdefault("".join(match), []).append(index)
+
+        removed = bytearray(len(name))
+
+        for position in range(1, len(name) - 1):
+            last_match = -1
+            depth = 0
+
+            while depth < position and position + depth + 1 < len(name):
+                indices = matches.get(name[position - depth - 1] + name[position] + name[position + depth + 1])
+                next_index = bisect.bisect_right(indices, last_match) if indices else 0
+
+                if not indices or next_index == len(indices):
+                    break
+
+                last_match = indices[next_index]
+                depth += 1
+
+            if depth:
+                removed[position - depth : position] = removed[position + 1 : position + depth + 1] = b"\1" * depth
+
+        return "".join(char for char, is_removed in zip(name, removed) if not is_removed)
 
     @staticmethod
     def strip_dangling_brackets(name: str) -> str:
@@ -317,17 +582,20 @@ class Sanitizer:
         """
 
         stack = []
+        dangling = set()
 
         for char in name:
-            if char in BRACKETS_MAPPING.values():
+            if char in BRACKETS_OPEN:
                 stack.append(char)
-            elif char in BRACKETS_MAPPING.keys():
+            elif char in BRACKETS_MAPPING:
                 if not stack or stack[-1] != BRACKETS_MAPPING[char]:
-                    name = name.replace(char, "")
+                    dangling.add(char)
                 else:
                     stack.pop()
 
-        while stack:
-            name = name.replace(stack.pop(), "")
+        dangling.update(stack)
+
+        if dangling:
+            name = name.translate(dict.fromkeys(map(ord, dangling)))
 
         return name.replace("()", "").replace("[]", "").replace("{}", "")
@@ -0,0 +1,130 @@
+import time
+from typing import IO, Any, Iterator, Sequence
+
+from pydantic import ValidationError
+
+from wumpus.admission import ADMISSION, Overloaded, estimate_cost
+from wumpus.cache import RESULT_CACHE
+from wumpus.codec import decode_member, dumps, loads
+from wumpus.compression import DECODING_ERRORS
+from wumpus.metrics import METRICS
+from wumpus.sanitizer import Member, MemberLike, SanitizerPlan
+
+MAX_LINE_LENGTH = 64 * 1024
+FLUSH_SIZE = 100
+
+
+class LineError(ValueError):
+    """
+    A request line that couldn't be read, with its 1-based number in the request body.
+    """
+
+    def __init__(self, message: str, line_number: int) -> None:
+        super().__init__(message)
+        self.line_number = line_number
+
+
+class LineTooLong(LineError):
+    pass
+
+
+class InvalidLineEncoding(LineError):
+    pass
+
+
+def iter_lines(stream: IO[bytes], max_line_length: int = MAX_LINE_LENGTH) -> Iterator[tuple[int, bytes]]:
+    """
+    Read newline-delimited lines from a stream without buffering more than one line at a time, with their 1-based
+    line numbers. Blank lines are skipped but still counted, and a line longer than `max_line_length` raises
+    `LineTooLong`. A stream from `open_decoder` that fails to decompress raises `InvalidLineEncoding`.
+    """
+
+    line_number = 0
+
+    while True:
+        line_number += 1
+
+        try:
+            line = stream.readline(max_line_length + 1)
+        except DECODING_ERRORS as error:
+            raise InvalidLineEncoding(str(error), line_number) from error
+
+        if not line:
+            return
+
+        if len(line) > max_line_length and not line.endswith(b"\n"):
+            raise LineTooLong(f"Line exceeds {max_line_length} bytes", line_number)
+
+        line = line.strip()
+        if line:
+            yield line_number, line
+
+
+def decode_line(line: bytes) -> MemberLike:
+    """
+    Decode a member line into a compact record, falling back to `Member` for coercion and validation errors.
+    """
+
+    try:
+        member = decode_member(loads(line))
+    except ValueError:
+        member = None
+
+    return member or Member.parse_raw(line)
+
+
+def sanitize_batch(plan: SanitizerPlan, members: Sequence[MemberLike]) -> bytes:
+    """
+    Sanitize a batch of streamed members once `ADMISSION` admits it, as `{id: name}` NDJSON lines.
+    """
+
+    with ADMISSION.admit(estimate_cost(members)):
+        start = time.perf_counter()
+        output = b"".join(dumps({member.id: plan.sanitize_member(member)}) + b"\n" for member in members)
+
+    RESULT_CACHE.flush()
+    METRICS.observe_batch(len(members), time.perf_counter() - start)
+    return output
+
+
+def sanitize_lines(plan: SanitizerPlan, lines: Iterator[tuple[int, bytes]]) -> Iterator[bytes]:
+    """
+    Sanitize NDJSON member lines, yielding `{id: name}` NDJSON lines in batches of up to `FLUSH_SIZE` members.
+
+    Each batch is admitted through `ADMISSION`. If the first batch is rejected, `Overloaded` is raised, so the caller
+    can still respond 429. After that the response status has been sent, so a bad line or a rejected batch ends the
+    stream with an error line.
+    """
+
+    batch: list[MemberLike] = []
+    line_number = first_line = 1
+    error: dict[str, Any] | None = None
+    sent = False
+
+    try:
+        try:
+            for line_number, line in lines:
+                if not batch:
+                    first_line = line_number
+
+                batch.append(decode_line(line))
+
+                if len(batch) >= FLUSH_SIZE:
+                    yield sanitize_batch(plan, batch)
+                    batch.clear()
+                    sent = True
+        except ValidationError as validation_error:
+            error = {"message": "Bad Request", "errors": validation_error.errors(), "line": line_number}
+        except LineError as line_error:
+            error = {"message": "Bad Request", "errors": [{"msg": str(line_error)}], "line": line_error.line_number}
+
+        if batch:
+            yield sanitize_batch(plan, batch)
+    except Overloaded as overloaded:
+        if not sent:
+            raise
+
+        error = {"message": "Too Many Requests", "retry_after": overloaded.retry_after, "line": first_line}
+
+    if error is not None:
+        yield dumps(error) + b"\n"
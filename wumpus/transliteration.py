@@ -0,0 +1,37 @@
+from unidecode import unidecode
+
+# Stands in for code points unidecode has no mapping for. Its mappings are all ASCII, so this can't be one.
+UNMAPPED = "\ufffd"
+
+
+class TransliterationTable(dict[int, str]):
+    """
+    A `str.translate` table of unidecode's mapping for each code point after `pre_table`, shared by every
+    `replace_char`: `transliterate` gives the same result as `unidecode(name.translate(pre_table), errors="replace",
+    replace_str=replace_char)`.
+
+    Mappings are computed the first time a code point is seen and kept, so a name is transliterated with a single
+    `str.translate` call. Code points without a mapping translate to `UNMAPPED` and are not kept, so the table never
+    holds more than unidecode's own data, whatever names it sees.
+    """
+
+    def __init__(self, pre_table: dict[int, str]) -> None:
+        super().__init__()
+        self.pre_table = pre_table
+
+    def __missing__(self, codepoint: int) -> str:
+        char = self.pre_table.get(codepoint, chr(codepoint))
+        value = unidecode(char, errors="replace", replace_str=UNMAPPED)
+
+        if value != UNMAPPED:
+            self[codepoint] = value
+
+        return value
+
+    def transliterate(self, name: str, replace_char: str) -> str:
+        name = name.translate(self)
+
+        if UNMAPPED in name:
+            name = name.replace(UNMAPPED, replace_char)
+
+        return name
@@ -0,0 +1,67 @@
+import pkgutil
+import re
+
+import unidecode
+from flask import Flask
+
+from wumpus.cache import RESULT_CACHE
+from wumpus.codec import decode_sanitize_request, dumps, loads
+from wumpus.metrics import METRICS
+from wumpus.sanitizer import SanitizerPlan
+
+SECTION_MODULE_REGEX = re.compile(r"x([0-9a-f]{3})")
+
+SAMPLE_BODY = (
+    '{"members": ['
+    '{"id": "1", "username": "!!\U0001d4e1\U0001d4ee\U0001d4ee\U0001d4ee \U0001f60e", "nickname": null, "roles": []},'
+    '{"id": "2", "username": "(a) [Teeest] \U0001f1fa\U0001f1f8 ™", "nickname": "ᴀʙᴄ <3"}'
+    "]}"
+).encode()
+
+
+def load_transliterations() -> list[int]:
+    """
+    Import every unidecode section module, which unidecode otherwise imports on the first use of a code point in
+    that section, and get the first code point of each section.
+    """
+
+    sections = []
+
+    for module in pkgutil.iter_modules(unidecode.__path__):
+        match = SECTION_MODULE_REGEX.fullmatch(module.name)
+
+        if match:
+            section = int(match[1], 16)
+            # The last code point, as unidecode returns ASCII without loading section 0.
+            unidecode.unidecode(chr(section << 8 | 0xFF))
+            sections.append(section << 8)
+
+    return sections
+
+
+def warm_up(app: Flask | None = None) -> None:
+    """
+    Load and build everything a request would otherwise load on first use: the unidecode sections, the
+    transliteration table of the default config, and a compiled default plan, by sanitizing a sample request
+    (through `app`, if given, to also set up Flask's request handling).
+
+    Run this in the gunicorn master before it forks, so every worker starts warm and shares the pages.
+    """
+
+    options, members = decode_sanitize_request(loads(SAMPLE_BODY))
+    plan = SanitizerPlan.compile(options)
+
+    for start in load_transliterations():
+        section = unidecode.Cache.get(start >> 8) or ()
+
+        for codepoint in range(start, start + len(section)):
+            plan.transliteration_table[codepoint]
+
+    dumps(plan.sanitize(members))
+
+    if app is not None:
+        app.test_client().post("/v1/sanitize", data=SAMPLE_BODY, content_type="application/json")
+
+    # Workers would otherwise all inherit the sample's results and measurements.
+    RESULT_CACHE.clear()
+    METRICS.reset()